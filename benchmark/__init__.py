@@ -0,0 +1 @@
+'''Benchmarks, run like `python -m aioclient.benchmark.response_memory`'''
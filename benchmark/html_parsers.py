@@ -0,0 +1,48 @@
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from ..client.htmlparser import HTML_PARSERS
+from ..client.request import Request
+from ..client.response import Response
+
+
+def load_corpus(directory: str) -> List[bytes]:
+    '''Saved pages (*.html) in `directory`, or a synthetic page.'''
+    if directory:
+        return [path.read_bytes() for path in sorted(Path(directory).glob('*.html'))]
+    rows = ''.join(f'<tr><td class="c{i}"><a href="/item/{i}">Item {i}</a></td>'
+                   f'<td>{i * 3.14:.2f}</td><td><p>Description of item {i}<br>'
+                   f'with <b>markup</b> &amp; entities</p></td></tr>'
+                   for i in range(2000))
+    page = (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Corpus</title></head>'
+            f'<body><div id="main"><table>{rows}</table></div></body></html>')
+    return [page.encode('utf-8')]
+
+
+def main() -> None:
+    pages = load_corpus(sys.argv[1] if len(sys.argv) > 1 else '')
+    request = Request('')
+    corpus = [(page, Response(url='', status=200, reason='OK', content=page,
+                              request=request).encoding) for page in pages]
+    total = sum(len(page) for page in pages)
+    print(f'{len(corpus)} pages, {total / 1e6:.2f} MB')
+    for name, parse in HTML_PARSERS.items():
+        try:
+            parse(b'<p></p>', 'utf-8')
+        except (ImportError, RuntimeError) as exc:
+            print(f'{name:>14}: unavailable ({exc.__class__.__name__})')
+            continue
+        rounds = 0
+        start = time.perf_counter()
+        while rounds == 0 or time.perf_counter() - start < 2:
+            for page, encoding in corpus:
+                parse(page, encoding)
+            rounds += 1
+        elapsed = time.perf_counter() - start
+        print(f'{name:>14}: {total * rounds / elapsed / 1e6:8.2f} MB/s')
+
+
+if __name__ == '__main__':
+    main()
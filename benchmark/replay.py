@@ -0,0 +1,53 @@
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ..client.cassette import Cassette
+from ..client.client import Client
+from ..client.request import Request
+from ..client.response import Response
+from .html_parsers import load_corpus
+
+
+def record(path: Path, count: int) -> None:
+    '''A synthetic cassette of `count` pages on 10 hosts.'''
+    page = load_corpus('')[0]
+    cassette = Cassette(path, mode='record')
+    for i in range(count):
+        request = Request(f'http://host{i % 10}.example.com/page/{i}')
+        cassette.record(request, Response(url=request.url, status=200, reason='OK',
+                                          content=page, request=request,
+                                          headers={'Content-Type': 'text/html'}))
+    cassette.close()
+
+
+async def replay(path: Path, parse: bool) -> None:
+    cassette = Cassette(path)
+    requests = [Request(f'http://host{i % 10}.example.com/page/{i}') for i in range(len(cassette))]
+    setting = {'cassette': cassette, 'concurrency': 32, 'concurrency_per_host': 8}
+    async with Client(setting) as client:
+        start = time.perf_counter()
+        responses = await client.submit(requests)
+        if parse:
+            await asyncio.gather(*(response.etree_async() for response in responses))
+        elapsed = time.perf_counter() - start
+    label = 'fetch and parse' if parse else 'fetch'
+    print(f'{label:>15}: {len(requests) / elapsed:8.1f} requests/s')
+
+
+def main() -> None:
+    '''Replay the cassette at `sys.argv[1]`, or a synthetic one.'''
+    with tempfile.TemporaryDirectory() as directory:
+        if len(sys.argv) > 1:
+            path = Path(sys.argv[1])
+        else:
+            path = Path(directory, 'cassette')
+            record(path, 20)
+        for parse in (False, True):
+            asyncio.run(replay(path, parse))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import gc
+import sys
+import tracemalloc
+
+from ..client.request import Request
+from ..client.response import Response
+
+
+def measure(count: int) -> float:
+    '''Bytes allocated per `Response`, excluding their shared body and
+    request.'''
+    request = Request('http://www.example.com/')
+    content = b'{"k": "v"}'
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    responses = [
+        Response(
+            url='http://www.example.com/',
+            status=200,
+            reason='OK',
+            content=content,
+            request=request,
+        )
+        for _ in range(count)
+    ]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del responses
+    return (after - before) / count
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f'{count} responses: {measure(count):.0f} bytes per response')
+    gc.disable()
+    measure(count)
+    print(f'objects left for the cyclic GC: {gc.collect()}')
+    gc.enable()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,14 @@
 '''Asyncio HTTP Client'''
 
 
+from .cache import CacheStore, HTTPCache, MemoryCacheStore, ResponseCache, SQLiteCacheStore
+from .cassette import Cassette
+from .checkpoint import Checkpoint
 from .client import Client
+from .exceptions import BodySizeError, CassetteError
 from .request import HTTPMethod, Request
+from .resolver import CachingResolver
 from .response import Response
+from .retry import RetryBudget, RetryPolicy
+from .session import SessionStore
 from .threadclient import ThreadClient, ThreadFuture
@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from copy import copy
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import (Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional,
+                    SupportsFloat, Tuple, Union)
+
+import aiofiles
+from multidict import CIMultiDict
+
+from .request import HTTPMethod, Request
+from .response import Response
+
+
+# Statuses which may be stored without explicit freshness (RFC 9110, 15.1).
+HEURISTIC_STATUSES = frozenset({200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501})
+
+
+class CacheEntry(NamedTuple):
+    url: str
+    status: int
+    reason: str
+    headers: List[Tuple[str, str]]
+    content: bytes
+    stored: float
+
+
+class CacheStore(ABC):
+    '''Base class of the stores of `HTTPCache`, mapping request
+    fingerprints to `CacheEntry`s.'''
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        ...
+
+    async def refresh(self, key: str, entry: CacheEntry) -> None:
+        '''Update an entry revalidated by a 304, whose body is unchanged.'''
+        await self.set(key, entry)
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryCacheStore(CacheStore):
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, CacheEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class SQLiteCacheStore(CacheStore):
+    '''Keep the headers in a SQLite index and the bodies as files in
+    `directory`. Index queries are small and run on the loop, bodies are
+    read and written with aiofiles.'''
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self._directory / 'index.sqlite'), isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS entries ('
+                         'key TEXT PRIMARY KEY, url TEXT, status INTEGER, '
+                         'reason TEXT, headers TEXT, stored REAL)')
+
+    def __len__(self) -> int:
+        return self._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        row = self._db.execute('SELECT url, status, reason, headers, stored '
+                               'FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        url, status, reason, headers, stored = row
+        try:
+            async with aiofiles.open(self._blob(key), 'rb') as file:
+                content = await file.read()
+        except FileNotFoundError:
+            await self.delete(key)
+            return None
+        headers = [tuple(header) for header in json.loads(headers)]
+        return CacheEntry(url, status, reason, headers, content, stored)
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        blob = self._blob(key)
+        blob.parent.mkdir(exist_ok=True)
+        temp = blob.with_name(f'.{key}.{os.getpid()}.{id(entry)}.part')
+        async with aiofiles.open(temp, 'wb') as file:
+            await file.write(entry.content)
+        os.replace(temp, blob)
+        await self.refresh(key, entry)
+
+    async def refresh(self, key: str, entry: CacheEntry) -> None:
+        self._db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                         (key, entry.url, entry.status, entry.reason,
+                          json.dumps(entry.headers), entry.stored))
+
+    async def delete(self, key: str) -> None:
+        self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+        try:
+            os.remove(self._blob(key))
+        except FileNotFoundError:
+            pass
+
+    async def close(self) -> None:
+        self._db.close()
+
+    def _blob(self, key: str) -> Path:
+        return self._directory / key[:2] / key
+
+
+class HTTPCache:
+    '''Private HTTP cache of GET responses following RFC 9111. Fresh
+    responses are served from `store`, and stale ones with `ETag` or
+    `Last-Modified` are revalidated by a conditional request. Responses
+    without explicit freshness stay fresh for `heuristic` times the time
+    since they were last modified, up to `max_heuristic` seconds.'''
+
+    def __init__(self, store: Optional[CacheStore] = None, *,
+                 heuristic: float = 0.1,
+                 max_heuristic: float = 24*60*60) -> None:
+        self.store = store if store is not None else MemoryCacheStore()
+        self.heuristic = heuristic
+        self.max_heuristic = max_heuristic
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return (f'<HTTPCache hits={self.hits} revalidations={self.revalidations} '
+                f'misses={self.misses}>')
+
+    async def fetch(self, request: Request,
+                    fetch: Callable[..., Awaitable[Response]],
+                    build: Callable[[CacheEntry], Response]) -> Response:
+        '''Serve `request` from the cache, or call `fetch(headers=...)` with
+        the conditional headers of a stale entry. `build` turns an entry
+        into a `Response`.'''
+        request_cc = _parse_cache_control(CIMultiDict(request.headers or {}).get('Cache-Control'))
+        if request.method != HTTPMethod.GET or 'no-store' in request_cc:
+            return await fetch()
+        key = _cache_key(request)
+        entry = await self.store.get(key)
+        if entry is not None and 'no-cache' not in request_cc and self._fresh(entry, request_cc):
+            self.hits += 1
+            return build(entry)
+        response = await fetch(headers=self._validators(entry))
+        if entry is not None and response.status == 304:
+            self.revalidations += 1
+            entry = self._revalidate(entry, response)
+            await self.store.refresh(key, entry)
+            return build(entry)
+        self.misses += 1
+        if entry is not None and response.status >= 500:
+            # A server error says nothing of the stored response, which is
+            # kept to be revalidated again.
+            return response
+        if self._storable(response):
+            await self.store.set(key, CacheEntry(
+                url=str(response.url),
+                status=response.status,
+                reason=response.reason,
+                headers=list(response.headers.items()),
+                content=response.content,
+                stored=time.time(),
+            ))
+        elif entry is not None and response.status > 0:
+            await self.store.delete(key)
+        return response
+
+    async def close(self) -> None:
+        await self.store.close()
+
+    def _fresh(self, entry: CacheEntry, request_cc: Dict[str, Optional[str]]) -> bool:
+        headers = CIMultiDict(entry.headers)
+        cc = _parse_cache_control(headers.get('Cache-Control'))
+        if 'no-cache' in cc:
+            return False
+        lifetime = self._lifetime(entry.status, headers, cc, entry.stored)
+        if 'max-age' in request_cc:
+            lifetime = min(lifetime, _seconds(request_cc['max-age']))
+        age = self._age(headers, entry.stored) + _seconds(request_cc.get('min-fresh'))
+        return age < lifetime
+
+    def _lifetime(self, status: int, headers: CIMultiDict,
+                  cc: Dict[str, Optional[str]], stored: float) -> float:
+        if 'max-age' in cc:
+            return _seconds(cc['max-age'])
+        date = _parse_date(headers.get('Date')) or stored
+        if 'Expires' in headers:
+            expires = _parse_date(headers['Expires'])
+            return 0 if expires is None else expires - date
+        last_modified = _parse_date(headers.get('Last-Modified'))
+        if last_modified is not None and status in HEURISTIC_STATUSES:
+            return min(self.heuristic * max(0, date - last_modified), self.max_heuristic)
+        return 0
+
+    def _age(self, headers: CIMultiDict, stored: float) -> float:
+        date = _parse_date(headers.get('Date')) or stored
+        initial = max(stored - date, _seconds(headers.get('Age')))
+        return max(0, initial) + time.time() - stored
+
+    def _validators(self, entry: Optional[CacheEntry]) -> Dict[str, str]:
+        if entry is None:
+            return {}
+        headers = CIMultiDict(entry.headers)
+        validators = {}
+        if 'ETag' in headers:
+            validators['If-None-Match'] = headers['ETag']
+        if 'Last-Modified' in headers:
+            validators['If-Modified-Since'] = headers['Last-Modified']
+        return validators
+
+    def _revalidate(self, entry: CacheEntry, response: Response) -> CacheEntry:
+        '''Update the stored headers with those of a 304 (RFC 9111, 4.3.4).'''
+        headers = CIMultiDict(entry.headers)
+        for name in set(response.headers.keys()):
+            if name.lower() not in ('content-length', 'content-encoding', 'transfer-encoding'):
+                headers.popall(name, None)
+                headers.extend((name, value) for value in response.headers.getall(name))
+        if 'Date' not in response.headers:
+            headers['Date'] = formatdate(usegmt=True)
+        return entry._replace(headers=list(headers.items()), stored=time.time())
+
+    def _storable(self, response: Response) -> bool:
+        if response.status <= 0 or response.status in (206, 304):
+            return False
+        cc = _parse_cache_control(response.headers.get('Cache-Control'))
+        if 'no-store' in cc or response.headers.get('Vary', '').strip() == '*':
+            return False
+        explicit = 'max-age' in cc or 'Expires' in response.headers
+        if not explicit and response.status not in HEURISTIC_STATUSES:
+            return False
+        return (explicit or 'ETag' in response.headers
+                or 'Last-Modified' in response.headers)
+
+
+class ResponseCache:
+    '''In-process LRU cache of successful `Response`s by request
+    fingerprint, regardless of HTTP caching headers. Entries expire after
+    `ttl` seconds (or `Request.cache_ttl`), and the least recently used
+    ones are evicted beyond `maxsize` entries or `maxbytes` of bodies.
+    It never awaits, so `Client`s on the same loop may share it, as long
+    as they send the same default headers and cookies: the fingerprint
+    does not cover them.
+
+    Only a `CacheEntry` of the response is kept, not the `Response`
+    itself, so its parsed text and trees are not kept alive.'''
+
+    def __init__(self, *,
+                 maxsize: int = 1024,
+                 maxbytes: int = 64*1024*1024,
+                 ttl: Optional[SupportsFloat] = None,
+                 methods: Iterable[str] = ('GET',)) -> None:
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self.methods = frozenset(methods)
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self) -> str:
+        return (f'<ResponseCache {len(self)}/{self.maxsize} {self._bytes}/{self.maxbytes}B '
+                f'hits={self.hits} misses={self.misses} evictions={self.evictions}>')
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, request: Request) -> Optional[CacheEntry]:
+        key = request.fingerprint()
+        item = self._entries.get(key)
+        if item is not None:
+            expires, _, entry = item
+            if expires is None or expires > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry
+            self._remove(key)
+        self.misses += 1
+        return None
+
+    def set(self, request: Request, response: Response) -> None:
+        if request.method.name not in self.methods or not 200 <= response.status < 300:
+            return
+        ttl = request.cache_ttl if request.cache_ttl is not None else self.ttl
+        size = len(response.buffer)
+        if (ttl is not None and float(ttl) <= 0) or size > self.maxbytes:
+            return
+        key = request.fingerprint()
+        if key in self._entries:
+            self._remove(key)
+        expires = None if ttl is None else time.monotonic() + float(ttl)
+        entry = CacheEntry(
+            url=str(response.url),
+            status=response.status,
+            reason=response.reason,
+            headers=list(response.headers.items()),
+            content=response.content,
+            stored=time.time(),
+        )
+        self._entries[key] = (expires, size, entry)
+        self._bytes += size
+        while len(self._entries) > self.maxsize or self._bytes > self.maxbytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+def _cache_key(request: Request) -> str:
+    '''Fingerprint of `request`, ignoring its own cache directives.'''
+    headers = {name: value for name, value in (request.headers or {}).items()
+               if name.lower() not in ('cache-control', 'pragma')}
+    if len(headers) != len(request.headers or {}):
+        request = copy(request)
+        request.headers = headers
+    return request.fingerprint()
+
+
+def _parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives = {}
+    for directive in (value or '').split(','):
+        name, _, argument = directive.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _parse_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+
+def _seconds(value: Optional[str]) -> int:
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 0
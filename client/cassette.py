@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import time
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, SupportsFloat, Tuple, Union
+
+from .cache import CacheEntry
+from .exceptions import CassetteError
+from .request import Request
+from .response import Response
+
+
+_CHUNK_SIZE = 64*1024
+
+
+class Cassette:
+    '''Request and response pairs recorded to, or replayed from, the file
+    at `path`. Every record is a JSON header line followed by the body,
+    compressed as its own gzip member, so a cassette cut short by a crash
+    is still readable up to its last record.
+
+    In `'replay'` mode, each response is served after `latency` seconds
+    plus its size divided by `bandwidth` bytes per second.'''
+
+    def __init__(self, path: Union[str, Path], *,
+                 mode: str = 'replay',
+                 latency: SupportsFloat = 0,
+                 bandwidth: Optional[SupportsFloat] = None) -> None:
+        if mode not in ('record', 'replay'):
+            raise ValueError(f'Unknown cassette mode: {mode}')
+        self._path = Path(path)
+        self._mode = mode
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self._file = None
+        self._count = 0
+        # Recorded entries of every fingerprint, and the next one to play.
+        # They are only kept for replaying.
+        self._entries: Dict[str, List[CacheEntry]] = defaultdict(list)
+        self._plays: Dict[str, int] = defaultdict(int)
+        if mode == 'record':
+            self._truncate()
+            self._file = open(self._path, 'ab')
+        else:
+            self._load()
+
+    def __repr__(self) -> str:
+        return f'<Cassette {self._mode} {self._path} {len(self)} records>'
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def replaying(self) -> bool:
+        return self._mode == 'replay'
+
+    def record(self, request: Request, response: Response) -> None:
+        entry = CacheEntry(
+            url=str(response.url),
+            status=response.status,
+            reason=response.reason,
+            headers=list(response.headers.items()),
+            content=response.content,
+            stored=time.time(),
+        )
+        header = {
+            'fingerprint': request.fingerprint(),
+            'request': f'{request.method.name} {request.url}',
+            'url': entry.url,
+            'status': entry.status,
+            'reason': entry.reason,
+            'headers': entry.headers,
+            'stored': entry.stored,
+            'size': len(entry.content),
+        }
+        line = json.dumps(header, separators=(',', ':')).encode() + b'\n'
+        self._file.write(gzip.compress(line + entry.content))
+        self._file.flush()
+        self._count += 1
+
+    async def play(self, request: Request) -> CacheEntry:
+        '''Serve the recorded responses of `request` in order, repeating
+        the last one once they run out.'''
+        key = request.fingerprint()
+        entries = self._entries.get(key)
+        if not entries:
+            raise CassetteError(f'no recorded response for {request}')
+        entry = entries[min(self._plays[key], len(entries) - 1)]
+        self._plays[key] += 1
+        delay = float(self.latency)
+        if self.bandwidth:
+            delay += len(entry.content) / float(self.bandwidth)
+        await asyncio.sleep(delay)
+        return entry
+
+    def rewind(self) -> None:
+        self._plays.clear()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def _load(self) -> None:
+        for _, data in self._scan():
+            line, content = data.split(b'\n', 1)
+            try:
+                header = json.loads(line)
+            except ValueError:
+                break
+            self._entries[header['fingerprint']].append(CacheEntry(
+                url=header['url'],
+                status=header['status'],
+                reason=header['reason'],
+                headers=[tuple(pair) for pair in header['headers']],
+                content=content,
+                stored=header['stored'],
+            ))
+            self._count += 1
+
+    def _truncate(self) -> None:
+        '''Cut off a record torn by a crash, so that new records are not
+        appended to it and lost along with it.'''
+        end = 0
+        for end, _ in self._scan():
+            self._count += 1
+        if self._path.exists() and self._path.stat().st_size > end:
+            with open(self._path, 'r+b') as file:
+                file.truncate(end)
+
+    def _scan(self) -> Iterator[Tuple[int, bytes]]:
+        '''Yield the end offset and the data of every complete record, up
+        to the first torn or corrupt one.'''
+        try:
+            file = open(self._path, 'rb')
+        except FileNotFoundError:
+            return
+        with file:
+            start = fed = 0
+            member = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            parts = []
+            data = file.read(_CHUNK_SIZE)
+            while data:
+                try:
+                    parts.append(member.decompress(data))
+                except zlib.error:
+                    return
+                fed += len(data)
+                if member.eof:
+                    start += fed - len(member.unused_data)
+                    yield start, b''.join(parts)
+                    data = member.unused_data or file.read(_CHUNK_SIZE)
+                    member = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    parts = []
+                    fed = 0
+                else:
+                    data = file.read(_CHUNK_SIZE)
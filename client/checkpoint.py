@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional, Union
+
+from .cache import CacheEntry
+from .request import Request
+from .response import Response
+
+
+class SavedFile(NamedTuple):
+    path: Path
+    size: int
+    digest: str
+
+
+def is_complete(response: Response) -> bool:
+    '''Errors and 5xx responses are fetched again on resume.'''
+    return 0 < response.status < 500
+
+
+class Checkpoint:
+    '''Journal of completed requests by fingerprint in a SQLite database
+    at `path`, optionally with their responses. Records are committed at
+    most `commit_interval` seconds after they are made, by a timer of the
+    running event loop (or right away without one), so a crash loses at
+    most that much progress, which is simply fetched again.'''
+
+    def __init__(self, path: Union[str, Path], *,
+                 store_responses: bool = False,
+                 is_complete: Callable[[Response], bool] = is_complete,
+                 commit_interval: float = 1.0) -> None:
+        self._store_responses = store_responses
+        self._is_complete = is_complete
+        self._commit_interval = commit_interval
+        self._committed = time.monotonic()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._db = sqlite3.connect(str(path))
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS requests ('
+                         'fingerprint TEXT PRIMARY KEY, url TEXT, status INTEGER, '
+                         'reason TEXT, headers TEXT, content BLOB, completed REAL, '
+                         'path TEXT, size INTEGER, digest TEXT)')
+        # Databases of older versions lack the columns of saved files.
+        columns = {row[1] for row in self._db.execute('PRAGMA table_info(requests)')}
+        for column, type_ in [('path', 'TEXT'), ('size', 'INTEGER'), ('digest', 'TEXT')]:
+            if column not in columns:
+                self._db.execute(f'ALTER TABLE requests ADD COLUMN {column} {type_}')
+        self._db.commit()
+
+    def __repr__(self) -> str:
+        return f'<Checkpoint {len(self)} completed>'
+
+    def __len__(self) -> int:
+        return self._db.execute('SELECT COUNT(*) FROM requests').fetchone()[0]
+
+    def __contains__(self, request: Request) -> bool:
+        return self._db.execute('SELECT 1 FROM requests WHERE fingerprint = ?',
+                                (request.fingerprint(),)).fetchone() is not None
+
+    def get(self, request: Request) -> Optional[CacheEntry]:
+        '''Return the recorded response of a completed `request`. Its body
+        and headers are empty unless `store_responses` was set. A request
+        saved to a file is only completed while the file is intact.'''
+        row = self._db.execute('SELECT url, status, reason, headers, content, completed, '
+                               'path, size FROM requests WHERE fingerprint = ?',
+                               (request.fingerprint(),)).fetchone()
+        if row is None:
+            return None
+        url, status, reason, headers, content, completed, path, size = row
+        # `save_to` is not part of the fingerprint. The body of a request
+        # saving a successful response must be in its file, and the body
+        # of one which did not save it must not be.
+        if request.save_to and 200 <= status < 300:
+            if path is None or Path(path) != Path(request.save_to):
+                return None
+            try:
+                if Path(path).stat().st_size != size:
+                    return None
+            except OSError:
+                return None
+        elif path is not None:
+            return None
+        headers = [tuple(header) for header in json.loads(headers)]
+        return CacheEntry(url, status, reason, headers, content or b'', completed)
+
+    def get_file(self, request: Request) -> Optional[SavedFile]:
+        '''Return the file saved by a completed `request`, if any.'''
+        row = self._db.execute('SELECT path, size, digest FROM requests WHERE fingerprint = ?',
+                               (request.fingerprint(),)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        path, size, digest = row
+        return SavedFile(Path(path), size, digest)
+
+    def record(self, request: Request, response: Response) -> None:
+        if not self._is_complete(response):
+            return
+        if self._store_responses:
+            headers, content = list(response.headers.items()), response.content
+        else:
+            headers, content = [], None
+        path = None if response.path is None else str(response.path)
+        self._db.execute('INSERT OR REPLACE INTO requests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         (request.fingerprint(), str(response.url), response.status,
+                          response.reason, json.dumps(headers), content, time.time(),
+                          path, response.size, response.digest))
+        if self._timer is not None:
+            return
+        delay = self._committed + self._commit_interval - time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if delay <= 0 or loop is None:
+            self.commit()
+        else:
+            self._timer = loop.call_later(delay, self.commit)
+
+    def commit(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._db.commit()
+        self._committed = time.monotonic()
+
+    def close(self) -> None:
+        self.commit()
+        self._db.close()
@@ -1,39 +1,184 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import logging
-from contextlib import asynccontextmanager
+import os
+import socket
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import AsyncExitStack, asynccontextmanager
 from copy import deepcopy
 from functools import partial
+from heapq import heappop, heappush
+from itertools import count
 from pathlib import Path
-from typing import AsyncGenerator, Iterable, Optional, Tuple, Union
+from typing import Any, AsyncGenerator, Callable, Iterable, List, Optional, Tuple, Union
 from weakref import WeakValueDictionary
 
 import aiofiles
-from aiohttp import ClientSession, ClientTimeout
+from aiohttp import (ClientError, ClientResponse, ClientSession, ClientTimeout, CookieJar,
+                     DefaultResolver, TCPConnector)
 from multidict import CIMultiDict
 from yarl import URL
 
+from .cache import CacheEntry
+from .compression import ACCEPT_ENCODING, Decoder, decompress_stream, get_decoder
+from .exceptions import BodySizeError, CassetteError
+from .jsonbackend import get_json_backend
+from .ratelimit import RateLimiter
 from .request import Request
+from .resolver import CachingResolver
+from .retry import RetryPolicy
 from .response import Response
 
 
+# Largest buffer preallocated from `Content-Length` in `buffer_mode`.
+_MAX_PREALLOCATE = 64*1024*1024
+
+
+class PrioritySemaphore:
+
+    def __init__(self, value: int, aging: float,
+                 loop: asyncio.AbstractEventLoop) -> None:
+        self._value = value
+        self._aging = aging
+        self._loop = loop
+        self._waiters = []
+        self._counter = count()
+
+    def __len__(self) -> int:
+        '''Number of waiters, including cancelled ones not yet discarded.'''
+        return len(self._waiters)
+
+    async def acquire(self, priority: int = 0) -> None:
+        '''Wait for a slot. Waiters with higher `priority` are woken first,
+        and a waiter gains `aging` priority per second it has waited.'''
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        # priority + aging * (now - enqueued) ranks waiters the same way
+        # at any time, so the heap key can be fixed at enqueue time.
+        key = self._aging * self._loop.time() - priority
+        future = self._loop.create_future()
+        heappush(self._waiters, (key, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+
+class HostSlots:
+
+    def __init__(self, limit: int, aging: float,
+                 loop: asyncio.AbstractEventLoop) -> None:
+        self._semaphore = PrioritySemaphore(limit, aging, loop)
+        self._limit = limit
+        self._debt = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def resize(self, limit: int) -> None:
+        '''Grow by releasing the semaphore. Shrink lazily by swallowing
+        the next releases, since running requests cannot be revoked.'''
+        while self._limit < limit:
+            self._limit += 1
+            if self._debt:
+                self._debt -= 1
+            else:
+                self._semaphore.release()
+        if limit < self._limit:
+            self._debt += self._limit - limit
+            self._limit = limit
+
+    async def acquire(self, priority: int = 0) -> None:
+        await self._semaphore.acquire(priority)
+
+    def release(self) -> None:
+        if self._debt:
+            self._debt -= 1
+        else:
+            self._semaphore.release()
+
+
 class Throttle:
 
     def __init__(self,
                  concurrency: int,
                  concurrency_per_host: int,
-                 loop: asyncio.AbstractEventLoop) -> None:
-        self._concurrency_semaphore = asyncio.Semaphore(concurrency, loop=loop)
-        self._host_semaphore_factory = partial(asyncio.Semaphore, concurrency_per_host, loop=loop)
+                 loop: asyncio.AbstractEventLoop, *,
+                 adaptive: bool = False,
+                 max_per_host: Optional[int] = None,
+                 backoff: float = 0.5,
+                 latency_tolerance: float = 2.0,
+                 aging: float = 1.0) -> None:
+        self._concurrency_semaphore = PrioritySemaphore(concurrency, aging, loop)
+        self._host_slots_factory = partial(HostSlots, aging=aging, loop=loop)
+        self._concurrency_per_host = concurrency_per_host
         self._hosts = WeakValueDictionary()
+        # Adaptive (AIMD) mode state, which outlives the slots of a host.
+        self._adaptive = adaptive
+        self._max_per_host = max_per_host or concurrency
+        self._backoff = backoff
+        self._latency_tolerance = latency_tolerance
+        self._limits = {}
+        self._latency = {}
 
     @asynccontextmanager
-    async def request(self, host: str) -> None:
-        semaphore = self._host_semaphore_factory()
-        host_semaphore = self._hosts.setdefault(host, semaphore)
-        async with self._concurrency_semaphore, host_semaphore:
-            yield
+    async def request(self, host: str, priority: int = 0) -> None:
+        slots = self._hosts.get(host)
+        if slots is None:
+            slots = self._host_slots_factory(int(self._get_limit(host)))
+            self._hosts[host] = slots
+        await self._concurrency_semaphore.acquire(priority)
+        try:
+            await slots.acquire(priority)
+            try:
+                yield
+            finally:
+                slots.release()
+        finally:
+            self._concurrency_semaphore.release()
+
+    def feedback(self, host: str, latency: float, status: int) -> None:
+        '''Adjust the limit of `host` after a request completed: additive
+        increase while responses succeed with stable latency, and
+        multiplicative decrease on errors, timeouts, 429 and 5xx.'''
+        if not self._adaptive:
+            return
+        limit = self._get_limit(host)
+        average = self._latency.get(host, latency)
+        if status == -1 or status == 429 or status >= 500:
+            limit = max(1.0, limit * self._backoff)
+        elif latency <= average * self._latency_tolerance:
+            limit = min(self._max_per_host, limit + 1 / limit)
+        self._limits[host] = limit
+        self._latency[host] = 0.8 * average + 0.2 * latency
+        slots = self._hosts.get(host)
+        if slots is not None:
+            slots.resize(int(limit))
+
+    def state(self) -> dict:
+        '''Current concurrency limit of every known host.'''
+        hosts = {host: int(limit) for host, limit in self._limits.items()}
+        hosts.update((host, slots.limit) for host, slots in self._hosts.items())
+        return hosts
+
+    def _get_limit(self, host: str) -> float:
+        return self._limits.get(host, float(self._concurrency_per_host))
 
 
 class Client:
@@ -42,21 +187,59 @@ class Client:
         'timeout': 20,
         'retry': 1,
         'retry_interval': 1,
+        'retry_policy': RetryPolicy(),
 
         'headers': CIMultiDict({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
                           'AppleWebKit/537.36 (KHTML, like Gecko) '
                           'Chrome/69.0.3497.100 Safari/537.36',
             'Accept': '*/*',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Accept-Language': 'en-US,en;q=0.9,zh-CN;q=0.8,zh;q=0.7,'
                                'ja;q=0.6,zh-TW;q=0.5',
         }),
         'cookies': {},
+        'session_store': None,
 
         'concurrency': 4,
         'concurrency_per_host': 2,
         'sleep_per_request': 1,
+        'max_pending': None,
+        'http_cache': None,
+        'response_cache': None,
+        'checkpoint': None,
+        'cassette': None,
+        'coalesce_methods': ('GET',),
+        'max_body_size': None,
+        'lazy_decompress': False,
+        'buffer_mode': False,
+        'html_parser': 'html5lib',
+        'json_backend': 'auto',
+        'parse_executor': 'thread',
+        'parse_workers': None,
+
+        'rate_limit': None,
+        'rate_limit_burst': 1,
+        'rate_limit_per_host': None,
+        'rate_limit_per_host_burst': 1,
+
+        'adaptive_concurrency': False,
+        'adaptive_concurrency_max_per_host': None,
+        'adaptive_concurrency_backoff': 0.5,
+        'adaptive_concurrency_latency_tolerance': 2.0,
+        'priority_aging': 1.0,
+
+        'pool_size': None,
+        'pool_size_per_host': None,
+        'keepalive_timeout': 30,
+        'dns_cache_ttl': 10,
+        'dns_negative_cache_ttl': 1,
+        'dns_cache_size': 1024,
+        'address_family': socket.AF_UNSPEC,
+        'resolver': None,
+        'force_close': False,
+        'socket_send_buffer': None,
+        'socket_receive_buffer': None,
     }
 
     def __init__(self, setting: Optional[dict] = None, *,
@@ -76,12 +259,40 @@ class Client:
         self._pending = 0
         self._processing = 0
         self._done = 0
+        self._tasks = set()
+        self._submitters = deque()
+        self._inflight = {}
+        self._coalesced = 0
+        self._rate_limiter = RateLimiter(self.setting['rate_limit'],
+                                         self.setting['rate_limit_burst'],
+                                         self.setting['rate_limit_per_host'],
+                                         self.setting['rate_limit_per_host_burst'],
+                                         pacing_burst=self.setting['concurrency_per_host'],
+                                         aging=self.setting['priority_aging'])
         # Get event loop.
         try:
             self._loop = loop or asyncio.get_event_loop()
         except RuntimeError:
             self._loop = asyncio.new_event_loop()
             asyncio.set_event_loop(self._loop)
+        self._throttle = Throttle(
+            self.setting['concurrency'],
+            self.setting['concurrency_per_host'],
+            self._loop,
+            adaptive=self.setting['adaptive_concurrency'],
+            max_per_host=self.setting['adaptive_concurrency_max_per_host'],
+            backoff=self.setting['adaptive_concurrency_backoff'],
+            latency_tolerance=self.setting['adaptive_concurrency_latency_tolerance'],
+            aging=self.setting['priority_aging'],
+        )
+        self._resolver = self.setting['resolver'] or CachingResolver(
+            DefaultResolver(loop=self._loop),
+            ttl=self.setting['dns_cache_ttl'],
+            negative_ttl=self.setting['dns_negative_cache_ttl'],
+            maxsize=self.setting['dns_cache_size'],
+        )
+        self._executor = self._make_executor()
+        self._json_backend = get_json_backend(self.setting['json_backend'])
         self._task = self._loop.create_task(self._run())
 
     def __repr__(self) -> str:
@@ -106,71 +317,294 @@ class Client:
         self._pending += len(requests)
         return future
 
+    async def submit_wait(self, requests: Union[Request, Iterable[Request]]) -> asyncio.Future:
+        '''Same as `submit()`, but first wait until the queued and in-flight
+        requests leave room for this batch under `max_pending`. A batch
+        larger than `max_pending` waits until the client is idle.'''
+        if not isinstance(requests, Request):
+            requests = list(requests)
+        size = 1 if isinstance(requests, Request) else len(requests)
+        limit = self.setting['max_pending']
+        while limit and self._outstanding and self._outstanding + size > limit:
+            waiter = self._loop.create_future()
+            self._submitters.append(waiter)
+            await waiter
+        return self.submit(requests)
+
+    async def stream(self, requests: Iterable[Request], *,
+                     buffer: Optional[int] = None) -> AsyncGenerator:
+        '''Yield responses in completion order. At most `buffer` requests
+        are submitted but not yet consumed, so `requests` may be a lazy
+        iterable and consumed responses can be garbage-collected.'''
+        buffer = buffer or 2 * self.setting['concurrency']
+        requests = iter(requests)
+        pending = set()
+        try:
+            while True:
+                for request in requests:
+                    pending.add(self.submit(request))
+                    if len(pending) >= buffer:
+                        break
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            [future.cancel() for future in pending]
+
+    async def prewarm(self, requests: Union[Request, Iterable[Request]]) -> None:
+        '''Resolve the hosts of a batch ahead of dispatching it. Lookup
+        failures are cached as well and reported when a request is sent.'''
+        if isinstance(requests, Request):
+            requests = [requests]
+        urls = {(request.url.host, request.url.port) for request in requests}
+        lookups = [self._resolver.resolve(host, port, family=self.setting['address_family'])
+                   for host, port in urls if host]
+        await asyncio.gather(*lookups, return_exceptions=True)
+
+    @property
+    def coalesced(self) -> int:
+        '''Number of requests served by an identical in-flight request.'''
+        return self._coalesced
+
+    def rate_limit_state(self) -> dict:
+        '''Current tokens of the global and per-host rate limit buckets.'''
+        return self._rate_limiter.state()
+
+    def concurrency_state(self) -> dict:
+        '''Current concurrency limit of every known host.'''
+        return self._throttle.state()
+
     async def close(self) -> None:
         try:
             await asyncio.wait_for(self._task, 0)
         except asyncio.TimeoutError:
             await asyncio.sleep(0.5)
             self._logger.info(f'{self._name} closed')
+        if self._executor is not self.setting['parse_executor']:
+            self._executor.shutdown(wait=False)
+        if self.setting['checkpoint'] is not None:
+            self.setting['checkpoint'].commit()
 
-    def _report_done(self, _) -> None:
+    @property
+    def _outstanding(self) -> int:
+        '''Number of queued and in-flight requests.'''
+        return self._pending + self._processing - self._done
+
+    def _wake_submitters(self) -> None:
+        '''Let producers blocked in `submit_wait()` check for room again.'''
+        while self._submitters:
+            waiter = self._submitters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _report_done(self, task: asyncio.Task) -> None:
         '''Helper function used by requests tasks.'''
+        self._tasks.discard(task)
         self._done += 1
+        self._wake_submitters()
 
     async def _run(self) -> None:
         self._logger.info(f'{self._name} start')
         timeout = ClientTimeout(total=self.setting['timeout'])
-        throttle = Throttle(self.setting['concurrency'],
-                            self.setting['concurrency_per_host'], self._loop)
         async with ClientSession(loop=self._loop,
+                                 connector=self._make_connector(),
                                  timeout=timeout,
                                  headers=self.setting['headers'],
-                                 cookies=self.setting['cookies']) as session:
-            process = partial(self._process, session=session, throttle=throttle)
-            while True:
-                future, single, requests = await self._queue.get()
-                self._pending -= len(requests)
-                self._processing = len(requests)
-                self._done = 0
-                if not future.cancelled():
-                    coros = map(process, requests)
-                    tasks = map(self._loop.create_task, coros)
-                    tasks = list(tasks)
-                    [task.add_done_callback(self._report_done) for task in tasks]
-                    responses = await asyncio.gather(*tasks)
-                    if single:
-                        future.set_result(responses[0])
+                                 cookies=self.setting['cookies'],
+                                 cookie_jar=self._cookie_jar(),
+                                 auto_decompress=False) as session:
+            process = partial(self._process, session=session, throttle=self._throttle)
+            try:
+                while True:
+                    future, single, requests = await self._queue.get()
+                    self._pending -= len(requests)
+                    if not future.cancelled():
+                        self._dispatch(future, single, requests, process)
                     else:
-                        future.set_result(responses)
-                self._queue.task_done()
+                        self._wake_submitters()
+                    self._queue.task_done()
+            finally:
+                # Requests still in flight must not outlive the session.
+                tasks = list(self._tasks)
+                [task.cancel() for task in tasks]
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _dispatch(self, future: asyncio.Future, single: bool,
+                  requests: List[Request], process: Callable) -> None:
+        '''Schedule a batch into the throttle without waiting for earlier
+        batches, and resolve its future once all of its requests are done.'''
+        tasks = [self._loop.create_task(process(request)) for request in requests]
+        for task in tasks:
+            self._tasks.add(task)
+            task.add_done_callback(self._report_done)
+        self._processing += len(tasks)
+        batch = asyncio.gather(*tasks)
+        batch.add_done_callback(partial(self._resolve, future, single, len(tasks)))
+        future.add_done_callback(lambda future: future.cancelled() and batch.cancel())
+
+    def _resolve(self, future: asyncio.Future, single: bool,
+                 size: int, batch: asyncio.Future) -> None:
+        '''Helper function used by batch futures.'''
+        self._processing -= size
+        self._done -= size
+        # A cancelled request makes `gather()` fail with `CancelledError`
+        # on newer Pythons, instead of being cancelled itself.
+        if batch.cancelled() or isinstance(batch.exception(), asyncio.CancelledError):
+            future.cancel()
+        elif future.done():
+            batch.exception()
+        elif batch.exception() is not None:
+            future.set_exception(batch.exception())
+        elif single:
+            future.set_result(batch.result()[0])
+        else:
+            future.set_result(batch.result())
 
     async def _process(self,
                        request: Request,
                        session: ClientSession,
                        throttle: Throttle) -> Response:
+        cassette = self.setting['cassette']
+        response = await self._process_cached(request, session, throttle)
+        if cassette is not None and not cassette.replaying and not (request.stream or request.save_to):
+            cassette.record(request, response)
+        return response
+
+    async def _process_cached(self,
+                              request: Request,
+                              session: ClientSession,
+                              throttle: Throttle) -> Response:
+        checkpoint = self.setting['checkpoint']
+        cache = self.setting['response_cache']
+        if request.stream:
+            checkpoint = None
+        if request.stream or request.save_to:
+            cache = None
+        if checkpoint is not None:
+            entry = checkpoint.get(request)
+            if entry is not None:
+                self._logger.debug(f'{request} checkpointed')
+                saved = checkpoint.get_file(request)
+                return self._make_cached_response(entry, request, resumed=True,
+                                                  **({} if saved is None else saved._asdict()))
+        if cache is not None:
+            entry = cache.get(request)
+            if entry is not None:
+                self._logger.debug(f'{request} cached')
+                return self._make_cached_response(entry, request)
+        response = await self._coalesce(request, session, throttle)
+        if cache is not None:
+            cache.set(request, response)
+        if checkpoint is not None:
+            checkpoint.record(request, response)
+        return response
+
+    async def _coalesce(self,
+                        request: Request,
+                        session: ClientSession,
+                        throttle: Throttle) -> Response:
+        if request.stream or request.save_to or request.method.name not in self.setting['coalesce_methods']:
+            return await self._fetch_cached(request, session, throttle)
+        # Identical requests wait for the first one in flight. If it is
+        # cancelled, one of them takes over.
+        key = request.fingerprint()
+        while key in self._inflight:
+            leader = self._inflight[key]
+            await asyncio.wait([leader])
+            if not leader.cancelled():
+                self._coalesced += 1
+                self._logger.debug(f'{request} coalesced')
+                return self._copy_response(leader.result(), request)
+        leader = self._loop.create_future()
+        self._inflight[key] = leader
+        try:
+            response = await self._fetch_cached(request, session, throttle)
+            leader.set_result(response)
+            return response
+        finally:
+            del self._inflight[key]
+            leader.cancel()
+
+    async def _fetch_cached(self,
+                            request: Request,
+                            session: ClientSession,
+                            throttle: Throttle) -> Response:
+        cache = self.setting['http_cache']
+        if cache is None or request.stream or request.save_to:
+            return await self._fetch(request, session, throttle)
+        return await cache.fetch(request,
+                                 partial(self._fetch, request, session, throttle),
+                                 partial(self._make_cached_response, request=request))
+
+    async def _fetch(self,
+                     request: Request,
+                     session: ClientSession,
+                     throttle: Throttle,
+                     headers: Optional[dict] = None) -> Response:
         self._logger.debug(f'{request} pending')
-        async with throttle.request(request.url.host):
+        sleep = self._get_setting(request.sleep, 'sleep_per_request')
+        rate_limit = partial(self._rate_limiter.acquire, request.url.host, sleep,
+                             request.priority or 0)
+        await rate_limit()
+        # The lease holds the throttle slot and the connections, and is
+        # handed over to streamed responses to be released by them. The
+        # slot is given back while waiting to retry, and every retry is
+        # rate limited again.
+        acquire = partial(throttle.request, request.url.host, request.priority or 0)
+        async with AsyncExitStack() as lease:
+            slot = await lease.enter_async_context(AsyncExitStack())
+            await slot.enter_async_context(acquire())
             self._logger.debug(f'{request} processing')
-            timeout, retry, retry_interval, sleep, req_params = self._make_aio_req_params(request)
+            timeout, retry, retry_interval, req_params = self._make_aio_req_params(request)
+            req_params['headers'].update(headers or {})
+            policy = self.setting['retry_policy']
+            policy.start()
+            cassette = self.setting['cassette']
+            start = time.monotonic()
             try:
-                for _ in range(retry+1):
+                attempt = 0
+                while True:
                     try:
-                        async with session.request(**req_params) as aio_resp:
-                            response = await self._make_response(request, aio_resp)
+                        if cassette is not None and cassette.replaying:
+                            entry = await cassette.play(request)
+                            response = self._make_cached_response(entry, request)
                             break
-                    except asyncio.TimeoutError:
-                        await asyncio.sleep(retry_interval)
-                else:
-                    raise asyncio.TimeoutError(f'{timeout}s')
+                        aio_resp = await session.request(**req_params)
+                        lease.callback(aio_resp.release)
+                        interval = policy.interval(attempt, retry, retry_interval,
+                                                   response=aio_resp)
+                        if interval is None:
+                            response = await self._make_response(request, aio_resp, lease)
+                            break
+                        aio_resp.release()
+                    except Exception as exc:
+                        interval = policy.interval(attempt, retry, retry_interval,
+                                                   exception=exc)
+                        if interval is None:
+                            if isinstance(exc, asyncio.TimeoutError):
+                                raise asyncio.TimeoutError(f'{timeout}s') from exc
+                            raise
+                    self._logger.debug(f'{request} retry in {interval:.2f}s')
+                    attempt += 1
+                    await slot.aclose()
+                    await asyncio.sleep(interval)
+                    await rate_limit()
+                    await slot.enter_async_context(acquire())
+            except asyncio.CancelledError:
+                # Cancelled by `close()`, `stream()` or the batch future,
+                # so there is no response to report.
+                raise
             except Exception as exc:
-                if not isinstance(exc, (asyncio.TimeoutError, asyncio.CancelledError)):
+                if not isinstance(exc, (asyncio.TimeoutError, ClientError,
+                                        BodySizeError, CassetteError)):
                     self._logger.exception('unexpected exception')
                 response = await self._make_response(request, exc)
-            finally:
-                await asyncio.sleep(sleep)
-                self._logger.debug(f'{request} complete '
-                                   f'({response.status}: {response.reason})')
-                return response
+            throttle.feedback(request.url.host, time.monotonic() - start, response.status)
+            self._logger.debug(f'{request} complete '
+                               f'({response.status}: {response.reason})')
+            return response
 
     async def _file_gen(self, path: Path) -> AsyncGenerator:
         async with aiofiles.open(path, 'rb') as file:
@@ -179,13 +613,95 @@ class Client:
                 yield chunk
                 chunk = await file.read(64*1024)
 
+    def _make_connector(self) -> TCPConnector:
+        '''Size the connection pool after the throttle by default, so that
+        a request holding a throttle slot never waits for a connection.'''
+        pool_size_per_host = self.setting['pool_size_per_host']
+        if pool_size_per_host is None:
+            if self.setting['adaptive_concurrency']:
+                pool_size_per_host = (self.setting['adaptive_concurrency_max_per_host']
+                                      or self.setting['concurrency'])
+            else:
+                pool_size_per_host = self.setting['concurrency_per_host']
+        options = {
+            'loop': self._loop,
+            'limit': self.setting['pool_size'] or self.setting['concurrency'],
+            'limit_per_host': pool_size_per_host,
+            'force_close': self.setting['force_close'],
+            'family': self.setting['address_family'],
+            'resolver': self._resolver,
+            'use_dns_cache': False,
+        }
+        if not self.setting['force_close']:
+            options['keepalive_timeout'] = self.setting['keepalive_timeout']
+        if self.setting['socket_send_buffer'] or self.setting['socket_receive_buffer']:
+            options['socket_factory'] = self._make_socket
+        return TCPConnector(**options)
+
+    def _cookie_jar(self) -> Optional[CookieJar]:
+        store = self.setting['session_store']
+        return None if store is None else store.cookie_jar
+
+    def _make_executor(self) -> Optional[Executor]:
+        '''Executor of `Response.*_async()`. `None` means the default
+        executor of the event loop. Only pools created here are shut
+        down by `close()`.'''
+        executor = self.setting['parse_executor']
+        workers = self.setting['parse_workers']
+        if executor == 'thread':
+            return ThreadPoolExecutor(workers, thread_name_prefix='aioclient-parse')
+        if executor == 'process':
+            return ProcessPoolExecutor(workers)
+        if executor is None or isinstance(executor, Executor):
+            return executor
+        raise ValueError(f'Unknown parse executor: {executor}')
+
+    def _make_socket(self, addr_info: Tuple) -> socket.socket:
+        '''Socket factory used by the connector to apply buffer sizes.'''
+        family, type_, proto, _, _ = addr_info
+        sock = socket.socket(family=family, type=type_, proto=proto)
+        if self.setting['socket_send_buffer']:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.setting['socket_send_buffer'])
+        if self.setting['socket_receive_buffer']:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.setting['socket_receive_buffer'])
+        return sock
+
+    async def _save(self, result: ClientResponse, path: Path,
+                    limit: Optional[int]) -> Tuple[int, str]:
+        '''Write the body to a temporary file next to `path`, and move it
+        into place once complete. Return the size and SHA-256 digest.'''
+        temp = path.with_name(f'.{path.name}.{os.getpid()}.{id(result)}.part')
+        size = 0
+        digest = hashlib.sha256()
+        chunks = decompress_stream(result.content.iter_chunked(1024*1024),
+                                   get_decoder(result.headers.get('Content-Encoding')))
+        try:
+            async with aiofiles.open(temp, 'wb') as file:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    self._check_body_size(limit, size)
+                    await file.write(chunk)
+                    digest.update(chunk)
+            os.replace(temp, path)
+        except BaseException:
+            try:
+                os.remove(temp)
+            except FileNotFoundError:
+                pass
+            raise
+        return size, digest.hexdigest()
+
+    def _get_setting(self, value: Any, key: str) -> Any:
+        '''Fall back to the client setting only if a request leaves the
+        value unset, so that explicit zeros are respected.'''
+        return self.setting[key] if value is None else value
+
     def _make_aio_req_params(self, request: Request) -> Tuple:
         url = request.url
         method = request.method.name
         timeout = request.timeout or self.setting['timeout']
-        retry = request.retry or self.setting['retry']
-        retry_interval = request.retry_interval or self.setting['retry_interval']
-        sleep = request.sleep or self.setting['sleep_per_request']
+        retry = self._get_setting(request.retry, 'retry')
+        retry_interval = self._get_setting(request.retry_interval, 'retry_interval')
         headers = deepcopy(self.setting['headers'])
         headers.update(request.headers or {})
         params = request.params
@@ -197,34 +713,153 @@ class Client:
         file = request.file and self._file_gen(request.file)
         possible_body = [json, form, body, text, file]
         assert len([v for v in possible_body if v is not None]) <= 1, 'Multiple request body.'
+        if json is not None:
+            # Encode with the same backend as `Response.json()` instead of aiohttp.
+            body = self._json_backend.dumps(json)
+            headers.setdefault('Content-Type', 'application/json')
 
-        return (timeout, retry, retry_interval, sleep,
+        return (timeout, retry, retry_interval,
                 {
                     'url': url,
                     'method': method,
                     'headers': headers,
                     'timeout': timeout,
                     'params': params,
-                    'json': json,
                     'data': form or body or text or file,
                 })
 
+    def _copy_response(self, response: Response, request: Request) -> Response:
+        '''Share the body of `response` with an identical `request`.'''
+        return Response(
+            url=response.url,
+            status=response.status,
+            reason=response.reason,
+            content=response.content,
+            request=request,
+            headers=response.headers,
+            html_parser=self.setting['html_parser'],
+            json_backend=self.setting['json_backend'],
+            executor=self._executor,
+        )
+
+    def _make_cached_response(self, entry: CacheEntry, request: Request, **kwargs) -> Response:
+        # A cache may be shared with clients of another `max_body_size`.
+        try:
+            self._check_body_size(self._get_setting(request.max_body_size, 'max_body_size'),
+                                  len(entry.content))
+        except BodySizeError as exc:
+            return self._make_error_response(request, exc)
+        return Response(
+            url=entry.url,
+            status=entry.status,
+            reason=entry.reason,
+            content=entry.content,
+            request=request,
+            headers=entry.headers,
+            html_parser=self.setting['html_parser'],
+            json_backend=self.setting['json_backend'],
+            executor=self._executor,
+            **kwargs,
+        )
+
     async def _make_response(self, request: Request,
-                             result: Union[Response, Exception]) -> Response:
+                             result: Union[ClientResponse, Exception],
+                             lease: Optional[AsyncExitStack] = None) -> Response:
         if isinstance(result, Exception):
+            return self._make_error_response(request, result)
+        limit = self._get_setting(request.max_body_size, 'max_body_size')
+        self._check_body_size(limit, int(result.headers.get('Content-Length', 0)))
+        if request.save_to and 200 <= result.status < 300:
+            size, digest = await self._save(result, request.save_to, limit)
+            resp = Response(
+                url=result.url,
+                status=result.status,
+                reason=result.reason,
+                content=b'',
+                request=request,
+                headers=result.headers,
+                html_parser=self.setting['html_parser'],
+                json_backend=self.setting['json_backend'],
+                executor=self._executor,
+                path=request.save_to,
+                size=size,
+                digest=digest,
+            )
+        elif request.stream:
             resp = Response(
-                url=URL(''),
-                status=-1,
-                reason=repr(result),
+                url=result.url,
+                status=result.status,
+                reason=result.reason,
                 content=b'',
                 request=request,
+                headers=result.headers,
+                html_parser=self.setting['html_parser'],
+                json_backend=self.setting['json_backend'],
+                executor=self._executor,
+                stream=result.content,
+                release=lease.pop_all().aclose,
             )
         else:
+            # A lazily decompressed body is kept as received. With a size
+            # limit it is decompressed now, so that the limit applies to
+            # what the body expands to.
+            decoder = get_decoder(result.headers.get('Content-Encoding'))
+            lazy = decoder is not None and self.setting['lazy_decompress'] and not limit
             resp = Response(
                 url=result.url,
                 status=result.status,
                 reason=result.reason,
-                content=await result.read(),
+                content=await self._read(result, limit, None if lazy else decoder),
+                content_encoding=result.headers['Content-Encoding'] if lazy else None,
                 request=request,
+                headers=result.headers,
+                html_parser=self.setting['html_parser'],
+                json_backend=self.setting['json_backend'],
+                executor=self._executor,
             )
         return resp
+
+    async def _read(self, result: ClientResponse, limit: Optional[int],
+                    decoder: Optional[Decoder]) -> Union[bytes, bytearray]:
+        if self.setting['buffer_mode']:
+            return await self._read_into(result, limit, decoder)
+        if not limit and decoder is None:
+            return await result.read()
+        chunks = []
+        size = 0
+        async for chunk in decompress_stream(result.content.iter_any(), decoder):
+            size += len(chunk)
+            self._check_body_size(limit, size)
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    async def _read_into(self, result: ClientResponse, limit: Optional[int],
+                         decoder: Optional[Decoder]) -> bytearray:
+        '''Read the body into a `bytearray` preallocated from `Content-Length`,
+        which is exposed without copying by `Response.buffer`.'''
+        size = 0
+        if decoder is None:
+            # Do not trust a huge `Content-Length`, the buffer grows anyway.
+            size = min(int(result.headers.get('Content-Length', 0)), _MAX_PREALLOCATE)
+        buffer = bytearray(size)
+        pos = 0
+        async for chunk in decompress_stream(result.content.iter_any(), decoder):
+            end = pos + len(chunk)
+            self._check_body_size(limit, end)
+            buffer[pos:end] = chunk
+            pos = end
+        del buffer[pos:]
+        return buffer
+
+    def _make_error_response(self, request: Request, exc: Exception) -> Response:
+        return Response(
+            url=URL(''),
+            status=-1,
+            reason=repr(exc),
+            content=b'',
+            request=request,
+        )
+
+    def _check_body_size(self, limit: Optional[int], size: int) -> None:
+        if limit and size > limit:
+            raise BodySizeError(f'body exceeds {limit} bytes')
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import zlib
+from typing import AsyncGenerator, AsyncIterable, Callable, Dict, Iterator, List, Optional
+
+from aiohttp import ClientPayloadError
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Output limit of a single decompression call. A body is decompressed in
+# pieces of at most about this size, so that a small body expanding to a
+# huge one (a decompression bomb) can be stopped between them.
+_PIECE_SIZE = 256*1024
+
+# zstandard can not limit its output, so input is fed to it in slices of
+# this size. A slice expands to at most a few 128 KiB blocks.
+_ZSTD_SLICE = 64
+
+
+class _Zlib:
+    '''gzip, or zlib wrapped deflate with `wbits` of `zlib.MAX_WBITS`.'''
+
+    def __init__(self, wbits: int = 16 + zlib.MAX_WBITS) -> None:
+        self._obj = zlib.decompressobj(wbits)
+
+    def decompress(self, data: bytes, max_length: int) -> Iterator[bytes]:
+        while True:
+            piece = self._obj.decompress(data, max_length)
+            data = self._obj.unconsumed_tail
+            if piece:
+                yield piece
+            # Without new output, everything is consumed, or the rest is
+            # after the end of the stream.
+            elif not data or self._obj.eof:
+                return
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+class _Deflate:
+    '''`deflate` should be zlib wrapped, but some servers send it raw.'''
+
+    def __init__(self) -> None:
+        self._obj = None
+
+    def decompress(self, data: bytes, max_length: int) -> Iterator[bytes]:
+        if self._obj is None:
+            if not data:
+                return
+            wbits = zlib.MAX_WBITS if data[0] & 0x0f == 8 else -zlib.MAX_WBITS
+            self._obj = _Zlib(wbits)
+        yield from self._obj.decompress(data, max_length)
+
+    def flush(self) -> bytes:
+        return b'' if self._obj is None else self._obj.flush()
+
+
+class _Brotli:
+
+    def __init__(self) -> None:
+        self._obj = brotli.Decompressor()
+        # brotlicffi can not limit the output.
+        self._bounded = hasattr(self._obj, 'can_accept_more_data')
+
+    def decompress(self, data: bytes, max_length: int) -> Iterator[bytes]:
+        if not self._bounded:
+            yield self._obj.process(data)
+            return
+        piece = self._obj.process(data, output_buffer_limit=max_length)
+        # Output left over by the limit, and input buffered behind it, are
+        # taken before any new input.
+        while piece or not self._obj.can_accept_more_data():
+            if piece:
+                yield piece
+            piece = self._obj.process(b'', output_buffer_limit=max_length)
+
+    def flush(self) -> bytes:
+        return b''
+
+
+class _Zstd:
+
+    def __init__(self) -> None:
+        self._obj = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes, max_length: int) -> Iterator[bytes]:
+        view = memoryview(data)
+        for start in range(0, len(view), _ZSTD_SLICE):
+            # The decompressor refuses any input after the end of the frame.
+            if self._obj.eof:
+                return
+            piece = self._obj.decompress(view[start:start+_ZSTD_SLICE])
+            if piece:
+                yield piece
+
+    def flush(self) -> bytes:
+        return b''
+
+
+DECOMPRESSORS: Dict[str, Callable] = {
+    'gzip': _Zlib,
+    'x-gzip': _Zlib,
+    'deflate': _Deflate,
+}
+if brotli is not None:
+    DECOMPRESSORS['br'] = _Brotli
+if zstandard is not None:
+    DECOMPRESSORS['zstd'] = _Zstd
+
+# Advertise only the codings that can be decoded here.
+ACCEPT_ENCODING = ', '.join(coding for coding in ('gzip', 'deflate', 'br', 'zstd')
+                            if coding in DECOMPRESSORS)
+
+
+class Decoder:
+    '''Incremental decoder of a `Content-Encoding` header. Codings listed
+    in it were applied in order, so they are undone in reverse order.'''
+
+    def __init__(self, content_encoding: str) -> None:
+        self._content_encoding = content_encoding
+        self._decompressors = [DECOMPRESSORS[coding]()
+                               for coding in reversed(_split(content_encoding))]
+
+    def decompress(self, data: bytes) -> bytes:
+        return b''.join(self.iter_decompress(data))
+
+    def flush(self) -> bytes:
+        return b''.join(self.iter_decompress(b'', final=True))
+
+    def iter_decompress(self, data: bytes, final: bool = False) -> Iterator[bytes]:
+        '''Decompress `data` lazily, in pieces of at most about `_PIECE_SIZE`
+        bytes. With `final`, also flush what is left of the body.'''
+        try:
+            yield from self._pipe(0, data, final)
+        except Exception as exc:
+            raise ClientPayloadError(f'Can not decode content-encoding: '
+                                     f'{self._content_encoding}') from exc
+
+    def _pipe(self, index: int, data: bytes, final: bool) -> Iterator[bytes]:
+        '''Feed `data` to the decompressor at `index`, and every piece of
+        its output to the next one.'''
+        if index == len(self._decompressors):
+            if data:
+                yield data
+            return
+        decompressor = self._decompressors[index]
+        for piece in decompressor.decompress(data, _PIECE_SIZE):
+            yield from self._pipe(index + 1, piece, False)
+        if final:
+            yield from self._pipe(index + 1, decompressor.flush(), True)
+
+
+def get_decoder(content_encoding: Optional[str]) -> Optional[Decoder]:
+    '''Return `None` if the body is not encoded, or is encoded by a coding
+    which can not be decoded here, in which case it is kept as is.'''
+    codings = _split(content_encoding or '')
+    if not codings or not all(coding in DECOMPRESSORS for coding in codings):
+        return None
+    return Decoder(content_encoding)
+
+
+def decompress(data: bytes, content_encoding: Optional[str]) -> bytes:
+    decoder = get_decoder(content_encoding)
+    if decoder is None:
+        return data
+    return decoder.decompress(data) + decoder.flush()
+
+
+async def decompress_stream(chunks: AsyncIterable[bytes],
+                            decoder: Optional[Decoder]) -> AsyncGenerator:
+    '''Yield the decompressed body in pieces of bounded size, so that a
+    consumer checking its size stops a decompression bomb early.'''
+    async for chunk in chunks:
+        if decoder is None:
+            if chunk:
+                yield chunk
+        else:
+            for piece in decoder.iter_decompress(chunk):
+                yield piece
+    if decoder is not None:
+        for piece in decoder.iter_decompress(b'', final=True):
+            yield piece
+
+
+def _split(content_encoding: str) -> List[str]:
+    codings = [coding.strip().lower() for coding in content_encoding.split(',')]
+    return [coding for coding in codings if coding not in ('', 'identity')]
@@ -0,0 +1,6 @@
+class BodySizeError(Exception):
+    pass
+
+
+class CassetteError(Exception):
+    pass
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import Callable, Union
+
+import html5lib
+import lxml.html
+from lxml import etree
+
+
+def parse_html5lib(content: bytes, encoding: str) -> etree._ElementTree:
+    '''Spec compliant, but pure Python.'''
+    return html5lib.parse(content, treebuilder='lxml', namespaceHTMLElements=False,
+                          transport_encoding=encoding)
+
+
+def parse_lxml(content: bytes, encoding: str) -> etree._ElementTree:
+    '''libxml2 based, much faster but less lenient with broken pages.'''
+    parser = lxml.html.HTMLParser(encoding=_strip_sig(encoding))
+    return lxml.html.document_fromstring(content, parser=parser).getroottree()
+
+
+def parse_html5_parser(content: bytes, encoding: str) -> etree._ElementTree:
+    '''Spec compliant and written in C, but needs the optional html5-parser
+    package built against the same libxml2 as lxml.'''
+    import html5_parser
+    return html5_parser.parse(content, transport_encoding=_strip_sig(encoding),
+                              treebuilder='lxml', namespace_elements=False,
+                              return_root=False)
+
+
+def _strip_sig(encoding: str) -> str:
+    '''libxml2 does not know `utf-8-sig`, but skips the BOM by itself.'''
+    return 'utf-8' if encoding.lower() == 'utf-8-sig' else encoding
+
+
+HTMLParser = Callable[[bytes, str], etree._ElementTree]
+
+HTML_PARSERS = {
+    'html5lib': parse_html5lib,
+    'lxml': parse_lxml,
+    'html5-parser': parse_html5_parser,
+}
+
+
+def get_html_parser(parser: Union[str, HTMLParser]) -> HTMLParser:
+    if callable(parser):
+        return parser
+    try:
+        return HTML_PARSERS[parser]
+    except KeyError:
+        raise ValueError(f'Unknown HTML parser: {parser}') from None
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+from functools import lru_cache, partial
+from typing import Any, Callable, NamedTuple, Union
+
+
+class JSONBackend(NamedTuple):
+    loads: Callable[[bytes], Any]
+    dumps: Callable[[Any], bytes]
+
+
+def load_orjson() -> JSONBackend:
+    '''Fastest, parses and produces bytes directly, but rejects `NaN`.'''
+    import orjson
+    return JSONBackend(orjson.loads, partial(orjson.dumps, option=orjson.OPT_NON_STR_KEYS))
+
+
+def load_ujson() -> JSONBackend:
+    import ujson
+    return JSONBackend(ujson.loads, lambda obj: ujson.dumps(obj, ensure_ascii=False).encode())
+
+
+def load_json() -> JSONBackend:
+    '''The standard library, same as aiohttp.'''
+    return JSONBackend(json.loads, lambda obj: json.dumps(obj).encode())
+
+
+JSON_BACKENDS = {
+    'orjson': load_orjson,
+    'ujson': load_ujson,
+    'json': load_json,
+}
+
+
+@lru_cache(maxsize=None)
+def get_json_backend(backend: Union[str, JSONBackend]) -> JSONBackend:
+    '''`'auto'` picks the first installed backend of `JSON_BACKENDS`.'''
+    if isinstance(backend, JSONBackend):
+        return backend
+    if backend == 'auto':
+        for load in JSON_BACKENDS.values():
+            try:
+                return load()
+            except ImportError:
+                pass
+    try:
+        load = JSON_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f'Unknown JSON backend: {backend}') from None
+    return load()
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from heapq import heappop, heappush
+from itertools import count
+from typing import Dict, Optional, SupportsFloat, Tuple
+
+
+class TokenBucket:
+
+    def __init__(self, rate: SupportsFloat, burst: int, aging: float = 1.0) -> None:
+        self._rate = float(rate)
+        self._burst = burst
+        self._aging = aging
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._counter = count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def __repr__(self) -> str:
+        return f'<TokenBucket {self.tokens:.2f}/{self._burst} @ {self._rate}/s>'
+
+    def __len__(self) -> int:
+        '''Number of waiters, including cancelled ones not yet discarded.'''
+        return len(self._waiters)
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def burst(self) -> int:
+        return self._burst
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, priority: int = 0) -> None:
+        '''Wait for a token. Like `PrioritySemaphore`, waiters with higher
+        `priority` get the next token, and a waiter gains `aging` priority
+        per second it has waited.'''
+        self._refill()
+        if self._tokens >= 1 and not self._waiters:
+            self._tokens -= 1
+            return
+        loop = asyncio.get_running_loop()
+        key = self._aging * loop.time() - priority
+        future = loop.create_future()
+        heappush(self._waiters, (key, next(self._counter), future))
+        self._schedule(loop)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._tokens += 1
+                self._wake()
+            raise
+
+    def _wake(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heappop(self._waiters)
+            if not future.done():
+                self._tokens -= 1
+                future.set_result(None)
+        if self._waiters:
+            self._schedule(asyncio.get_running_loop())
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._timer is None:
+            self._refill()
+            self._timer = loop.call_later(max(0.0, 1 - self._tokens) / self._rate, self._wake)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+class RateLimiter:
+
+    def __init__(self,
+                 rate: Optional[SupportsFloat],
+                 burst: int,
+                 rate_per_host: Optional[SupportsFloat],
+                 burst_per_host: int, *,
+                 pacing_burst: int = 1,
+                 aging: float = 1.0) -> None:
+        self._bucket = TokenBucket(rate, burst, aging) if rate else None
+        self._aging = aging
+        self._rate_per_host = rate_per_host
+        self._burst_per_host = burst_per_host
+        self._pacing_burst = pacing_burst
+        self._hosts: Dict[str, TokenBucket] = {}
+        self._pacing: Dict[Tuple[str, float], TokenBucket] = {}
+
+    async def acquire(self, host: str, sleep: SupportsFloat = 0, priority: int = 0) -> None:
+        '''Wait until both the host bucket and the global bucket grant a
+        token, served by `priority`. This should be called before taking
+        a `Throttle` slot.
+
+        Without a per-host rate, a `sleep` per request paces the host
+        instead, at `pacing_burst` requests per `sleep` seconds.'''
+        if self._rate_per_host:
+            bucket = self._hosts.get(host)
+            if bucket is None:
+                if len(self._hosts) >= 1024:
+                    self._prune()
+                bucket = TokenBucket(self._rate_per_host, self._burst_per_host, self._aging)
+                self._hosts[host] = bucket
+            await bucket.acquire(priority)
+        elif float(sleep) > 0:
+            key = (host, float(sleep))
+            bucket = self._pacing.get(key)
+            if bucket is None:
+                if len(self._pacing) >= 1024:
+                    self._prune()
+                bucket = TokenBucket(self._pacing_burst / key[1], self._pacing_burst, self._aging)
+                self._pacing[key] = bucket
+            await bucket.acquire(priority)
+        if self._bucket is not None:
+            await self._bucket.acquire(priority)
+
+    def state(self) -> dict:
+        '''Current tokens of the global bucket and every host bucket,
+        `None` meaning unlimited.'''
+        self._prune()
+        return {
+            'tokens': None if self._bucket is None else self._bucket.tokens,
+            'hosts': {host: bucket.tokens for host, bucket in self._hosts.items()},
+        }
+
+    def _prune(self) -> None:
+        '''Full buckets carry no state, so forget them.'''
+        for buckets in (self._hosts, self._pacing):
+            full = [key for key, bucket in buckets.items()
+                    if bucket.tokens >= bucket.burst and not bucket]
+            for key in full:
+                del buckets[key]
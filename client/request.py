@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from enum import Enum, auto
 from pathlib import Path
 from typing import Optional, SupportsFloat, Union
+from urllib.parse import urlencode
 
 from yarl import URL
 
@@ -21,6 +24,11 @@ class Request:
                  retry: Optional[int] = None,
                  retry_interval: Optional[SupportsFloat] = None,
                  sleep: Optional[SupportsFloat] = None,
+                 priority: Optional[int] = None,
+                 stream: bool = False,
+                 save_to: Optional[Union[str, Path]] = None,
+                 max_body_size: Optional[int] = None,
+                 cache_ttl: Optional[SupportsFloat] = None,
                  headers: Optional[dict] = None,
                  params: Optional[dict] = None,
                  json: Optional[dict] = None,
@@ -36,6 +44,11 @@ class Request:
         self.retry = retry
         self.retry_interval = retry_interval
         self.sleep = sleep
+        self.priority = priority
+        self.stream = stream
+        self.save_to = Path(save_to) if save_to is not None else save_to
+        self.max_body_size = max_body_size
+        self.cache_ttl = cache_ttl
         self.params = params
         self.json = json
         self.form = form
@@ -47,6 +60,30 @@ class Request:
     def __repr__(self) -> str:
         return f'<Request {self.method.name} {self.url}>'
 
+    def fingerprint(self) -> str:
+        '''A stable digest of what is sent on the wire: method, url with
+        query, headers and body. `meta` and client-side options such as
+        `timeout` are not part of it.'''
+        url = self.url.update_query(self.params) if self.params else self.url
+        url = url.with_query(sorted(url.query.items()))
+        headers = sorted((k.lower(), str(v)) for k, v in (self.headers or {}).items())
+        if self.json is not None:
+            body = json.dumps(self.json, sort_keys=True).encode()
+        elif self.form is not None:
+            body = urlencode(sorted(self.form.items())).encode()
+        elif self.text is not None:
+            body = self.text.encode()
+        elif self.file is not None:
+            body = str(self.file.resolve()).encode()
+        else:
+            body = self.body or b''
+        digest = hashlib.sha256()
+        for part in [self.method.name, str(url), repr(headers)]:
+            digest.update(part.encode())
+            digest.update(b'\0')
+        digest.update(body)
+        return digest.hexdigest()
+
     def __eq__(self, other: Request) -> bool:
         return (
             self.__class__ == other.__class__
@@ -57,6 +94,11 @@ class Request:
             and self.retry == other.retry
             and self.retry_interval == other.retry_interval
             and self.sleep == other.sleep
+            and self.priority == other.priority
+            and self.stream == other.stream
+            and self.save_to == other.save_to
+            and self.max_body_size == other.max_body_size
+            and self.cache_ttl == other.cache_ttl
             and self.params == other.params
             and self.json == other.json
             and self.form == other.form
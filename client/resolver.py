@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, List, Optional, SupportsFloat, Tuple
+
+from aiohttp.abc import AbstractResolver
+
+
+class CachingResolver(AbstractResolver):
+    '''Wrap another aiohttp resolver with a LRU cache. Successful lookups
+    are kept for `ttl` seconds and failed ones for `negative_ttl` seconds,
+    and concurrent lookups of the same name share one query.'''
+
+    def __init__(self, resolver: AbstractResolver, *,
+                 ttl: Optional[SupportsFloat] = 10,
+                 negative_ttl: SupportsFloat = 1,
+                 maxsize: int = 1024) -> None:
+        self._resolver = resolver
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._maxsize = maxsize
+        self._cache: OrderedDict = OrderedDict()
+        self._lookups: Dict[Tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f'<CachingResolver {len(self._cache)}/{self._maxsize} hits={self.hits} misses={self.misses}>'
+
+    async def resolve(self, host: str, port: int = 0,
+                      family: int = socket.AF_INET) -> List[dict]:
+        key = (host, port, family)
+        entry = self._cache.get(key)
+        if entry is not None:
+            expires, result = entry
+            if expires is None or expires > time.monotonic():
+                self.hits += 1
+                self._cache.move_to_end(key)
+                if isinstance(result, Exception):
+                    raise result
+                return result
+            del self._cache[key]
+        self.misses += 1
+        lookup = self._lookups.get(key)
+        if lookup is None:
+            lookup = asyncio.ensure_future(self._lookup(key))
+            self._lookups[key] = lookup
+            lookup.add_done_callback(partial(self._forget, key))
+        # Shield the shared lookup from the cancellation of one caller.
+        return await asyncio.shield(lookup)
+
+    async def close(self) -> None:
+        await self._resolver.close()
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _forget(self, key: Tuple, lookup: asyncio.Future) -> None:
+        '''Helper function used by lookup futures.'''
+        del self._lookups[key]
+        if not lookup.cancelled():
+            lookup.exception()
+
+    async def _lookup(self, key: Tuple) -> List[dict]:
+        try:
+            result = await self._resolver.resolve(*key)
+        except OSError as exc:
+            self._store(key, exc, self._negative_ttl)
+            raise
+        self._store(key, result, self._ttl)
+        return result
+
+    def _store(self, key: Tuple, result, ttl: Optional[SupportsFloat]) -> None:
+        expires = None if ttl is None else time.monotonic() + float(ttl)
+        self._cache[key] = (expires, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._maxsize:
+            self._cache.popitem(last=False)
@@ -1,43 +1,110 @@
 from __future__ import annotations
 
-import json
-from functools import lru_cache
-from typing import Any, Optional, Union
+import asyncio
+import codecs
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncGenerator, Awaitable, Callable, Mapping, Optional, Tuple, Union
 
 import cchardet
-import html5lib
+import lxml.html
+from aiohttp import StreamReader
 from lxml import etree
+from multidict import CIMultiDict, CIMultiDictProxy
 from yarl import URL
 
+from .compression import decompress, decompress_stream, get_decoder
+from .htmlparser import HTMLParser, get_html_parser
+from .jsonbackend import JSONBackend, get_json_backend
 from .request import Request
 
 
+_UNSET = object()
+_NO_HEADERS = CIMultiDictProxy(CIMultiDict())
+
+# UTF-32 BOMs start with UTF-16 BOMs, so they are checked first.
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+_CHARSET_RE = re.compile(r'''charset\s*=\s*["']?([\w.:-]+)''', re.I)
+_META_CHARSET_RE = re.compile(rb'''<meta[^>]+charset\s*=\s*["']?([\w.:-]+)''', re.I)
+# Only this much of the body is inspected to detect its encoding.
+_PREFIX_SIZE = 64*1024
+
+
 class Response:
 
+    __slots__ = (
+        '_url', '_status', '_reason', '_content', '_content_encoding', '_request',
+        '_headers', '_html_parser', '_json_backend', '_executor',
+        '_stream', '_release', '_path', '_size', '_digest', '_resumed',
+        # Lazily computed fields, see encoding, text(), json() and etree().
+        '_encoding', '_text', '_json', '_html', '_xml',
+    )
+
     def __init__(self, *,
                  url: Union[str, URL],
                  status: int,
                  reason: str,
-                 content: bytes,
-                 request: Request) -> None:
+                 content: Union[bytes, bytearray],
+                 request: Request,
+                 content_encoding: Optional[str] = None,
+                 headers: Optional[Mapping[str, str]] = None,
+                 html_parser: Union[str, HTMLParser] = 'html5lib',
+                 json_backend: Union[str, JSONBackend] = 'auto',
+                 executor: Optional[Executor] = None,
+                 stream: Optional[StreamReader] = None,
+                 release: Optional[Callable[[], Awaitable]] = None,
+                 path: Optional[Path] = None,
+                 size: Optional[int] = None,
+                 digest: Optional[str] = None,
+                 resumed: bool = False) -> None:
         self._url = URL(url)
         self._status = status
         self._reason = reason
         self._content = content
+        self._content_encoding = content_encoding
         self._request = request
-        self.text = lru_cache(maxsize=8)(self.text)
-        self.json = lru_cache(maxsize=2)(self.json)
-        self.etree = lru_cache(maxsize=2)(self.etree)
+        if headers is None:
+            headers = _NO_HEADERS
+        elif not isinstance(headers, CIMultiDictProxy):
+            headers = CIMultiDictProxy(CIMultiDict(headers))
+        self._headers = headers
+        self._html_parser = html_parser
+        self._json_backend = json_backend
+        self._executor = executor
+        self._stream = stream
+        self._release = release
+        self._path = path
+        self._size = size
+        self._digest = digest
+        self._resumed = resumed
+        self._encoding = None
+        self._text = None
+        self._json = _UNSET
+        self._html = None
+        self._xml = None
 
     def __repr__(self) -> str:
         return f'<Response {self.status} {self.url}>'
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
     def __eq__(self, other: Response) -> bool:
         return (self.__class__ == other.__class__
                 and self._url == other._url
                 and self._status == other._status
                 and self._reason == other._reason
-                and self._content == other._content
+                and self._data() == other._data()
                 and self._request == other._request)
 
     @property
@@ -54,7 +121,19 @@ class Response:
 
     @property
     def content(self) -> bytes:
-        return self._content
+        '''Body in raw bytes. A body kept compressed by the `lazy_decompress`
+        setting of the client is decompressed on first access, and a body
+        read by the `buffer_mode` setting is copied once into `bytes`.'''
+        data = self._data()
+        if not isinstance(data, bytes):
+            data = self._content = bytes(data)
+        return data
+
+    @property
+    def buffer(self) -> memoryview:
+        '''Body without copying it. It shares memory with the body, so it
+        must not be modified.'''
+        return memoryview(self._data())
 
     @property
     def request(self) -> Request:
@@ -64,15 +143,213 @@ class Response:
     def meta(self) -> dict:
         return self._request.meta
 
+    @property
+    def headers(self) -> CIMultiDictProxy:
+        return self._headers
+
+    @property
+    def encoding(self) -> str:
+        '''Encoding of the body, taken from the charset of `Content-Type`,
+        a BOM, or a HTML `<meta>` charset, in that order. Otherwise the
+        beginning of the body is checked for UTF-8, and then detected by
+        cchardet, falling back to UTF-8.'''
+        if self._encoding is None:
+            self._encoding = self._resolve_encoding()
+        return self._encoding
+
+    @property
+    def path(self) -> Optional[Path]:
+        return self._path
+
+    @property
+    def size(self) -> Optional[int]:
+        return self._size
+
+    @property
+    def digest(self) -> Optional[str]:
+        return self._digest
+
+    @property
+    def resumed(self) -> bool:
+        '''Whether the response was recorded by the checkpoint of the client
+        in an earlier run, instead of being fetched.'''
+        return self._resumed
+
+    @property
+    def streaming(self) -> bool:
+        '''Whether the body is still waiting to be read by `iter_chunks()`.'''
+        return self._stream is not None
+
+    async def iter_chunks(self, size: int = 64*1024) -> AsyncGenerator:
+        '''Iterate over the body. A streamed body can only be iterated once,
+        and its connection and throttle slot are released when it is
+        exhausted or when the iteration stops early.'''
+        if self._stream is None:
+            data = self._data()
+            if data:
+                yield data
+            return
+        decoder = get_decoder(self._headers.get('Content-Encoding'))
+        try:
+            async for chunk in decompress_stream(self._stream.iter_chunked(size), decoder):
+                yield chunk
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        '''Release the connection and the throttle slot held by a streamed
+        body. It is safe to call this more than once.'''
+        self._stream = None
+        if self._release is not None:
+            release, self._release = self._release, None
+            await release()
+
     def text(self, encoding: Optional[str] = None) -> str:
-        encoding = encoding or cchardet.detect(self.content)['encoding'] or 'utf-8'
-        return self.content.decode(encoding)
+        encoding = encoding or self.encoding
+        # Only the text of the last requested encoding is kept.
+        if self._text is None or self._text[0] != encoding:
+            self._text = (encoding, self._data().decode(encoding))
+        return self._text[1]
 
     def json(self) -> Any:
-        return json.loads(self.content)
+        if self._json is _UNSET:
+            self._json = _loads(self._data(), self._json_backend)
+        return self._json
 
-    def etree(self, *, html: bool = True) -> etree._ElementTree:
+    def etree(self, *, html: bool = True,
+              parser: Optional[Union[str, HTMLParser]] = None) -> etree._ElementTree:
         if html:
-            return html5lib.parse(self.content, treebuilder='lxml', namespaceHTMLElements=False)
+            parser = parser or self._html_parser
+            # Only the tree of the last requested parser is kept.
+            if self._html is None or self._html[0] != parser:
+                tree = get_html_parser(parser)(self._data(), self.encoding)
+                self._html = (parser, tree)
+            return self._html[1]
         else:
-            return etree.fromstring(self.content).getroottree()
+            if self._xml is None:
+                self._xml = _parse_xml(self._data())
+            return self._xml
+
+    async def text_async(self, encoding: Optional[str] = None) -> str:
+        '''Same as `text()`, but decode in the executor of the client.'''
+        encoding = encoding or self.encoding
+        if self._text is None or self._text[0] != encoding:
+            text = await self._run_in_executor(_decode, self._data(), encoding)
+            self._text = (encoding, text)
+        return self._text[1]
+
+    async def json_async(self) -> Any:
+        '''Same as `json()`, but parse in the executor of the client.'''
+        if self._json is _UNSET:
+            self._json = await self._run_in_executor(_loads, self._data(),
+                                                     self._json_backend)
+        return self._json
+
+    async def etree_async(self, *, html: bool = True,
+                          parser: Optional[Union[str, HTMLParser]] = None) -> etree._ElementTree:
+        '''Same as `etree()`, but parse in the executor of the client.'''
+        loop = asyncio.get_running_loop()
+        in_process = isinstance(self._executor, ProcessPoolExecutor)
+        if html:
+            parser = parser or self._html_parser
+            if self._html is None or self._html[0] != parser:
+                if in_process:
+                    # lxml trees can not be pickled, so the worker sends back
+                    # the serialized tree, which libxml2 rebuilds quickly
+                    # with the same element classes.
+                    data, html_elements = await self._run_in_executor(
+                        _parse_html_serialized, self._data(), self.encoding, parser)
+                    tree = await loop.run_in_executor(None, _parse_serialized, data, html_elements)
+                else:
+                    tree = await self._run_in_executor(_parse_html, self._data(),
+                                                       self.encoding, parser)
+                self._html = (parser, tree)
+            return self._html[1]
+        else:
+            if self._xml is None:
+                # Same as above, parsing XML in another process gains nothing.
+                if in_process:
+                    self._xml = await loop.run_in_executor(None, _parse_xml, self._data())
+                else:
+                    self._xml = await self._run_in_executor(_parse_xml, self._data())
+            return self._xml
+
+    def _data(self) -> Union[bytes, bytearray]:
+        if self._content_encoding is not None:
+            self._content = decompress(self._content, self._content_encoding)
+            self._content_encoding = None
+        return self._content
+
+    def _run_in_executor(self, func: Callable, *args) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        try:
+            return loop.run_in_executor(self._executor, func, *args)
+        except RuntimeError:
+            # The pool of the client was shut down by `Client.close()`.
+            return loop.run_in_executor(None, func, *args)
+
+    def _resolve_encoding(self) -> str:
+        match = _CHARSET_RE.search(self._headers.get('Content-Type', ''))
+        if match and _is_codec(match.group(1)):
+            return match.group(1)
+        data = self._data()
+        for bom, encoding in _BOMS:
+            if data.startswith(bom):
+                return encoding
+        prefix = data[:_PREFIX_SIZE]
+        match = _META_CHARSET_RE.search(prefix[:4096])
+        if match and _is_codec(match.group(1).decode('ascii')):
+            return match.group(1).decode('ascii')
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            decoder.decode(prefix, final=len(prefix) == len(data))
+        except UnicodeDecodeError:
+            return cchardet.detect(prefix)['encoding'] or 'utf-8'
+        else:
+            return 'utf-8'
+
+
+# Parsing helpers run by `*_async()`. They are module level functions taking
+# only the body and plain arguments, so process pools can pickle them.
+
+def _decode(content: bytes, encoding: str) -> str:
+    return content.decode(encoding)
+
+
+def _loads(content: bytes, backend: Union[str, JSONBackend]) -> Any:
+    return get_json_backend(backend).loads(content)
+
+
+def _parse_html(content: bytes, encoding: str,
+                parser: Union[str, HTMLParser]) -> etree._ElementTree:
+    return get_html_parser(parser)(content, encoding)
+
+
+def _parse_html_serialized(content: bytes, encoding: str,
+                           parser: Union[str, HTMLParser]) -> Tuple[bytes, bool]:
+    '''Trees of `lxml.html.HtmlElement`s are serialized as HTML, since HTML
+    attribute names like `@click` are not valid XML. Others are serialized
+    as XML, which html5lib makes sure is valid.'''
+    tree = _parse_html(content, encoding, parser)
+    html_elements = isinstance(tree.getroot(), lxml.html.HtmlElement)
+    method = 'html' if html_elements else 'xml'
+    return etree.tostring(tree, method=method, encoding='utf-8'), html_elements
+
+
+def _parse_serialized(content: bytes, html_elements: bool) -> etree._ElementTree:
+    if html_elements:
+        parser = lxml.html.HTMLParser(encoding='utf-8')
+        return lxml.html.document_fromstring(content, parser=parser).getroottree()
+    return _parse_xml(content)
+
+
+def _parse_xml(content: bytes) -> etree._ElementTree:
+    return etree.fromstring(content).getroottree()
+
+
+def _is_codec(encoding: str) -> bool:
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        return False
+    return True
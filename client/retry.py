@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Optional, SupportsFloat, Type
+
+from aiohttp import ClientConnectionError, ClientResponse
+
+
+class RetryBudget:
+
+    def __init__(self, ratio: float = 0.2, reserve: int = 10) -> None:
+        self._ratio = ratio
+        self._reserve = reserve
+        self._balance = float(reserve)
+
+    def __repr__(self) -> str:
+        return f'<RetryBudget {self._balance:.2f}/{self._reserve}>'
+
+    @property
+    def balance(self) -> float:
+        return self._balance
+
+    def deposit(self) -> None:
+        '''Every request earns `ratio` retries, up to `reserve`.'''
+        self._balance = min(self._reserve, self._balance + self._ratio)
+
+    def withdraw(self) -> bool:
+        if self._balance < 1:
+            return False
+        self._balance -= 1
+        return True
+
+
+class RetryPolicy:
+
+    def __init__(self, *,
+                 backoff: float = 2.0,
+                 jitter: float = 0.5,
+                 max_interval: SupportsFloat = 60,
+                 statuses: Iterable[int] = (429, 502, 503, 504),
+                 exceptions: Iterable[Type[Exception]] = (asyncio.TimeoutError,
+                                                          ClientConnectionError),
+                 retry_after: bool = True,
+                 budget: Optional[RetryBudget] = None) -> None:
+        self.backoff = backoff
+        self.jitter = jitter
+        self.max_interval = max_interval
+        self.statuses = frozenset(statuses)
+        self.exceptions = tuple(exceptions)
+        self.retry_after = retry_after
+        self.budget = budget if budget is not None else RetryBudget()
+
+    def __repr__(self) -> str:
+        return (f'<RetryPolicy x{self.backoff} jitter={self.jitter} '
+                f'statuses={sorted(self.statuses)}>')
+
+    def start(self) -> None:
+        '''Called once for every request before its first attempt.'''
+        self.budget.deposit()
+
+    def interval(self, attempt: int, retry: int, retry_interval: SupportsFloat, *,
+                 response: Optional[ClientResponse] = None,
+                 exception: Optional[Exception] = None) -> Optional[float]:
+        '''Return the seconds to wait before retrying a failed attempt, or
+        `None` if it should not be retried. `attempt` counts from 0.'''
+        if attempt >= retry:
+            return None
+        if response is not None and response.status not in self.statuses:
+            return None
+        if exception is not None and not isinstance(exception, self.exceptions):
+            return None
+        if not self.budget.withdraw():
+            return None
+        interval = float(retry_interval) * self.backoff ** attempt
+        interval *= 1 - self.jitter * random.random()
+        if response is not None and self.retry_after:
+            interval = max(interval, self._parse_retry_after(response) or 0)
+        return min(interval, float(self.max_interval))
+
+    def _parse_retry_after(self, response: ClientResponse) -> Optional[float]:
+        value = response.headers.get('Retry-After')
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.cookies import BaseCookie, CookieError, Morsel, SimpleCookie
+from pathlib import Path
+from typing import Any, Iterator, List, MutableMapping, Optional, Union
+
+from aiohttp import CookieJar
+from yarl import URL
+
+
+class SessionStore(MutableMapping):
+    '''Cookies and other session state such as auth tokens, kept in an
+    append-only JSON lines file at `path`. Creating it replays the file
+    once, and every change appends one line. The file is compacted on
+    load when less than `1 / compact_ratio` of its lines are still live.
+
+    Use `cookie_jar` as the cookie jar of aiohttp sessions, and the store
+    itself as a dict of JSON values. `unsafe` lets the jar accept cookies
+    from IP addresses.'''
+
+    def __init__(self, path: Union[str, Path], *,
+                 compact_ratio: float = 2.0,
+                 unsafe: bool = False) -> None:
+        self._path = Path(path)
+        self._compact_ratio = compact_ratio
+        self._state = {}
+        # Cookie records by (host, name, domain, path), see `_record_cookies()`.
+        self._cookies: OrderedDict = OrderedDict()
+        self._unsafe = unsafe
+        self._cookie_jar = None
+        self._file = None
+        lines = self._load()
+        if lines > self._compact_ratio * (len(self._state) + len(self._cookies)):
+            self.compact()
+        self._file = open(self._path, 'a', encoding='utf-8', opener=_private)
+
+    def __repr__(self) -> str:
+        return f'<SessionStore {self._path} state={len(self._state)} cookies={len(self._cookies)}>'
+
+    def __getitem__(self, key: str) -> Any:
+        return self._state[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._state[key] = value
+        self._write(['s', key, value])
+
+    def __delitem__(self, key: str) -> None:
+        del self._state[key]
+        self._write(['d', key])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._state)
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    @property
+    def cookie_jar(self) -> CookieJar:
+        '''aiohttp cookie jars need a running event loop, so the jar is
+        created and filled with the stored cookies on first use.'''
+        if self._cookie_jar is None:
+            self._cookie_jar = _JournaledCookieJar(self, unsafe=self._unsafe)
+            for url, cookie, _ in self._cookies.values():
+                CookieJar.update_cookies(self._cookie_jar, SimpleCookie(cookie), URL(url))
+        return self._cookie_jar
+
+    def compact(self) -> None:
+        '''Rewrite the file with only the live records.'''
+        now = time.time()
+        records = [['s', key, value] for key, value in self._state.items()]
+        records += [['c', url, cookie] for url, cookie, expires in self._cookies.values()
+                    if expires is None or expires > now]
+        temp = self._path.with_name(f'.{self._path.name}.{os.getpid()}.part')
+        with open(temp, 'w', encoding='utf-8', opener=_private) as file:
+            for record in records:
+                file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        os.replace(temp, self._path)
+        if self._file is not None:
+            self._file.close()
+            self._file = open(self._path, 'a', encoding='utf-8', opener=_private)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _load(self) -> int:
+        try:
+            file = open(self._path, 'r+b')
+        except FileNotFoundError:
+            return 0
+        lines = 0
+        end = 0
+        with file:
+            for line in file:
+                if not line.endswith(b'\n'):
+                    # A line torn by a crash while it was written. Cut it
+                    # off, or the next record would be appended to it.
+                    file.truncate(end)
+                    break
+                end += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                lines += 1
+                kind, key, *value = record
+                if kind == 's':
+                    self._state[key] = value[0]
+                elif kind == 'd':
+                    self._state.pop(key, None)
+                elif kind == 'c':
+                    self._remember(key, SimpleCookie(value[0]))
+        return lines
+
+    def _record_cookies(self, cookies: Any, response_url: URL) -> None:
+        '''Journal cookies accepted by the jar. `Max-Age` is turned into an
+        absolute `Expires`, so that replaying them later does not extend
+        their lifetime.'''
+        for morsel in _morsels(cookies):
+            morsel = morsel.copy()
+            if morsel['max-age']:
+                try:
+                    morsel['expires'] = formatdate(time.time() + int(morsel['max-age']), usegmt=True)
+                except ValueError:
+                    pass
+                morsel['max-age'] = ''
+            cookie = SimpleCookie()
+            cookie[morsel.key] = morsel
+            url = str(response_url)
+            self._write(['c', url, morsel.OutputString()])
+            self._remember(url, cookie)
+
+    def _remember(self, url: str, cookie: SimpleCookie) -> None:
+        host = URL(url).host
+        for morsel in cookie.values():
+            key = (host, morsel.key, morsel['domain'].lower(), morsel['path'])
+            self._cookies.pop(key, None)
+            self._cookies[key] = (url, morsel.OutputString(), _parse_expires(morsel['expires']))
+
+    def _write(self, record: List) -> None:
+        if self._file is not None:
+            self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+            self._file.flush()
+
+
+class _JournaledCookieJar(CookieJar):
+
+    def __init__(self, store: SessionStore, *, unsafe: bool = False) -> None:
+        super().__init__(unsafe=unsafe)
+        self._store = store
+
+    def update_cookies(self, cookies: Any, response_url: URL = URL()) -> None:
+        super().update_cookies(cookies, response_url)
+        self._store._record_cookies(cookies, response_url)
+
+    def update_cookies_from_headers(self, headers: List[str], response_url: URL) -> None:
+        '''Newer aiohttp passes `Set-Cookie` headers of responses here.'''
+        super().update_cookies_from_headers(headers, response_url)
+        cookie = SimpleCookie()
+        for header in headers:
+            try:
+                cookie.load(header)
+            except CookieError:
+                pass
+        self._store._record_cookies(cookie, response_url)
+
+
+def _morsels(cookies: Any) -> Iterator[Morsel]:
+    items = cookies.items() if hasattr(cookies, 'items') else cookies
+    for name, value in items:
+        if isinstance(value, Morsel):
+            yield value
+        elif isinstance(value, BaseCookie):
+            yield from value.values()
+        else:
+            cookie = SimpleCookie()
+            cookie[name] = value
+            yield cookie[name]
+
+
+def _parse_expires(value: str) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+
+def _private(path: str, flags: int) -> int:
+    '''Cookies and tokens are secrets, so only the owner may read them.'''
+    return os.open(path, flags, 0o600)
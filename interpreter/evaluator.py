@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import inspect
 from itertools import takewhile
 from typing import Any, List
 
@@ -124,20 +126,21 @@ class Evaluator:
         if isinstance(responses, Response):
             single = True
             responses = [responses]
-        results = []
-        for response in responses:
-            for branch in expr.branches:
-                flag, result = self._eval_branch_node(branch, response)
-                if flag:
-                    results.append(result)
-                    break
-            else:
-                results.append(response)
+        # Responses are parsed concurrently in the executor of the client.
+        results = await asyncio.gather(*[self._eval_branches(expr.branches, response)
+                                         for response in responses])
         if single:
             return results[0]
         else:
             return results
 
+    async def _eval_branches(self, branches: List[ast.BranchNode], response: Response) -> Any:
+        for branch in branches:
+            flag, result = await self._eval_branch_node(branch, response)
+            if flag:
+                return result
+        return response
+
     async def _eval_then_expr(self, expr: ast.ThenExpression) -> Any:
         return await self._eval_expr(expr.expr)
 
@@ -195,7 +198,7 @@ class Evaluator:
                  self._eval_py_object_node(node.value),
                  self._eval_text_node(node.field)) for node in set_list]
 
-    def _eval_branch_node(self, node: ast.BranchNode, response: Response) -> Any:
+    async def _eval_branch_node(self, node: ast.BranchNode, response: Response) -> Any:
         if isinstance(node.attr, ast.EmptyNode):
             flag = True
         else:
@@ -209,16 +212,18 @@ class Evaluator:
             raw_type = self._eval_text_node(node.content_type)
             content_type = match(raw_type,
                 'bytes', 'content',
-                'str', 'text()',
-                'json', 'json()',
-                'html', 'etree()',
-                'xml', 'etree(html=False)',
+                'str', 'text_async()',
+                'json', 'json_async()',
+                'html', 'etree_async()',
+                'xml', 'etree_async(html=False)',
                 strict=False,
             )
             if content_type is False:
                 raise EvaluatorError(f'Unknown content type: {raw_type}')
             try:
                 obj = eval(f'response.{content_type}')
+                if inspect.isawaitable(obj):
+                    obj = await obj
                 if isinstance(node.action, ast.PyBlockNode):
                     result = self._eval_py_block_node(node.action, response, obj)
                 else:
@@ -0,0 +1,7 @@
+from ..client.response import Response
+
+
+def make_response(request, content=b'content', status=200, headers=None):
+    '''A complete `Response` to `request`, as read by a `Client`.'''
+    return Response(url=request.url, status=status, reason='OK', request=request,
+                    content=content, headers=headers)
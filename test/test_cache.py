@@ -0,0 +1,147 @@
+import asyncio
+import tempfile
+import time
+from email.utils import formatdate
+
+from ..client.cache import CacheEntry, CacheStore, HTTPCache, MemoryCacheStore, ResponseCache, SQLiteCacheStore
+from ..client.request import HTTPMethod, Request
+from ..client.response import Response
+from .asynctest import AsyncTest
+from .helpers import make_response
+
+
+class FakeServer:
+
+    def __init__(self, status=200, headers=None, content=b'content'):
+        self.status = status
+        self.headers = headers or {}
+        self.content = content
+        self.requests = []
+
+    async def fetch(self, request, headers=None):
+        self.requests.append(headers or {})
+        status = self.status
+        if headers and headers.get('If-None-Match') == self.headers.get('ETag'):
+            status = 304
+        return Response(url=request.url, status=status, reason='', request=request,
+                        content=b'' if status == 304 else self.content,
+                        headers=self.headers)
+
+    async def get(self, cache, request):
+        return await cache.fetch(request, lambda **kwargs: self.fetch(request, **kwargs),
+                                 lambda entry: Response(url=entry.url, status=entry.status,
+                                                        reason=entry.reason, request=request,
+                                                        content=entry.content,
+                                                        headers=entry.headers))
+
+
+class TestCache(AsyncTest):
+
+    @AsyncTest.asynchronize
+    async def test_fresh(self):
+        cache = HTTPCache()
+        server = FakeServer(headers={'Cache-Control': 'max-age=60'})
+        request = Request('url')
+        for _ in range(3):
+            response = await server.get(cache, request)
+            self.assertEqual(response.content, b'content')
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        await server.get(cache, Request('url', headers={'Cache-Control': 'max-age=0'}))
+        self.assertEqual(len(server.requests), 2)
+        await server.get(cache, Request('url', method=HTTPMethod.POST))
+        await server.get(cache, Request('url', method=HTTPMethod.POST))
+        self.assertEqual(len(server.requests), 4)
+
+    @AsyncTest.asynchronize
+    async def test_revalidate(self):
+        cache = HTTPCache()
+        server = FakeServer(headers={'ETag': '"v1"', 'Last-Modified': formatdate(usegmt=True),
+                                     'Cache-Control': 'no-cache'})
+        request = Request('url')
+        await server.get(cache, request)
+        response = await server.get(cache, request)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.content, b'content')
+        self.assertEqual(server.requests[1]['If-None-Match'], '"v1"')
+        self.assertIn('If-Modified-Since', server.requests[1])
+        self.assertEqual(cache.revalidations, 1)
+        # A server error to the revalidation keeps the stored response.
+        server.status, server.headers = 503, {}
+        response = await server.get(cache, request)
+        self.assertEqual(response.status, 503)
+        self.assertEqual(len(cache.store), 1)
+        server.status, server.headers = 200, {'ETag': '"v1"'}
+        response = await server.get(cache, request)
+        self.assertEqual((response.status, response.content), (200, b'content'))
+        self.assertEqual(cache.revalidations, 2)
+
+    @AsyncTest.asynchronize
+    async def test_not_storable(self):
+        store = MemoryCacheStore()
+        cache = HTTPCache(store)
+        for headers in [{}, {'Cache-Control': 'no-store, max-age=60'},
+                        {'Cache-Control': 'max-age=60', 'Vary': '*'}]:
+            await FakeServer(headers=headers).get(cache, Request('url'))
+            self.assertEqual(len(store), 0)
+        await FakeServer(status=500, headers={'ETag': '"v1"'}).get(cache, Request('url'))
+        self.assertEqual(len(store), 0)
+        await FakeServer(status=500, headers={'Expires': formatdate(time.time() + 60)}).get(cache, Request('url'))
+        self.assertEqual(len(store), 1)
+
+    def test_store_interface(self):
+        with self.assertRaises(TypeError):
+            CacheStore()
+
+    @AsyncTest.asynchronize
+    async def test_heuristic(self):
+        cache = HTTPCache()
+        now = time.time()
+        headers = {'Date': formatdate(now), 'Last-Modified': formatdate(now - 1000)}
+        entry = CacheEntry('url', 200, 'OK', list(headers.items()), b'', now)
+        self.assertTrue(cache._fresh(entry, {}))
+        entry = entry._replace(stored=now - 101)
+        self.assertFalse(cache._fresh(entry, {}))
+
+    @AsyncTest.asynchronize
+    async def test_sqlite_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SQLiteCacheStore(directory)
+            entry = CacheEntry('url', 200, 'OK', [('ETag', '"v1"')], b'content', 1.0)
+            await store.set('key', entry)
+            await store.close()
+            store = SQLiteCacheStore(directory)
+            self.assertEqual(await store.get('key'), entry)
+            await store.refresh('key', entry._replace(stored=2.0))
+            self.assertEqual((await store.get('key')).stored, 2.0)
+            await store.delete('key')
+            self.assertIsNone(await store.get('key'))
+            self.assertEqual(len(store), 0)
+            await store.close()
+
+    @AsyncTest.asynchronize
+    async def test_response_cache(self):
+        cache = ResponseCache(maxsize=2, maxbytes=10)
+        a, b, c = Request('a'), Request('b'), Request('c')
+        self.assertIsNone(cache.get(a))
+        cache.set(a, make_response(a, b'aaaa'))
+        cache.set(b, make_response(b, b'bbbb'))
+        self.assertEqual(cache.get(a).content, b'aaaa')
+        cache.set(c, make_response(c, b'cccc'))
+        self.assertIsNone(cache.get(b))
+        self.assertEqual((len(cache), cache.nbytes), (2, 8))
+        cache.set(b, make_response(b, b'bbbbbbbb'))
+        self.assertEqual((len(cache), cache.nbytes), (1, 8))
+        cache.set(a, make_response(a, b'a' * 11))
+        cache.set(a, make_response(a, status=404))
+        cache.set(Request('a', method=HTTPMethod.POST), make_response(a))
+        self.assertIsNone(cache.get(a))
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (1, 3, 3))
+
+        cache = ResponseCache(ttl=60)
+        cache.set(a, make_response(a))
+        cache.set(Request('b', cache_ttl=0.05), make_response(b))
+        await asyncio.sleep(0.1)
+        self.assertIsInstance(cache.get(a), CacheEntry)
+        self.assertIsNone(cache.get(Request('b')))
+        self.assertEqual(len(cache), 1)
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import time
+
+from ..client.cassette import Cassette
+from ..client.exceptions import CassetteError
+from ..client.request import Request
+from .asynctest import AsyncTest
+from .helpers import make_response
+
+
+class TestCassette(AsyncTest):
+
+    @AsyncTest.asynchronize
+    async def test_replay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cassette')
+            cassette = Cassette(path, mode='record')
+            self.assertFalse(cassette.replaying)
+            a, b = Request('a'), Request('b')
+            cassette.record(a, make_response(a, b'1', status=503, headers={'K': 'v'}))
+            cassette.record(a, make_response(a, b'2'))
+            cassette.record(b, make_response(b, b'\x00' * 1000))
+            cassette.close()
+            cassette = Cassette(path)
+            self.assertTrue(cassette.replaying)
+            self.assertEqual(len(cassette), 3)
+            first = await cassette.play(Request('a', meta={'m': 1}))
+            self.assertEqual((first.url, first.status, first.content), ('a', 503, b'1'))
+            self.assertEqual(first.headers, [('K', 'v')])
+            self.assertEqual((await cassette.play(a)).content, b'2')
+            self.assertEqual((await cassette.play(a)).content, b'2')
+            cassette.rewind()
+            self.assertEqual((await cassette.play(a)).content, b'1')
+            self.assertEqual(len((await cassette.play(b)).content), 1000)
+            with self.assertRaises(CassetteError):
+                await cassette.play(Request('c'))
+
+    @AsyncTest.asynchronize
+    async def test_torn(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cassette')
+            cassette = Cassette(path, mode='record')
+            a, b = Request('a'), Request('b')
+            cassette.record(a, make_response(a, b'a'))
+            cassette.record(b, make_response(b, b'b'))
+            cassette.close()
+            with open(path, 'r+b') as file:
+                file.truncate(os.path.getsize(path) - 10)
+            cassette = Cassette(path)
+            self.assertEqual(len(cassette), 1)
+            self.assertEqual((await cassette.play(a)).content, b'a')
+
+            # Recording again cuts off the torn record first.
+            cassette = Cassette(path, mode='record')
+            self.assertEqual(len(cassette), 1)
+            cassette.record(b, make_response(b, b'b'))
+            cassette.close()
+            with open(path, 'ab') as file:
+                file.write(b'\x1f\x8b garbage')
+            cassette = Cassette(path)
+            self.assertEqual(len(cassette), 2)
+            self.assertEqual((await cassette.play(b)).content, b'b')
+
+    @AsyncTest.asynchronize
+    async def test_latency(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cassette')
+            cassette = Cassette(path, mode='record')
+            a = Request('a')
+            cassette.record(a, make_response(a, b'\x00' * 1000))
+            cassette.close()
+            cassette = Cassette(path, latency=0.1, bandwidth=10000)
+            start = time.monotonic()
+            await cassette.play(a)
+            self.assertGreaterEqual(time.monotonic() - start, 0.2)
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+
+from ..client.checkpoint import Checkpoint, SavedFile
+from ..client.request import Request
+from ..client.response import Response
+from .asynctest import AsyncTest
+from .helpers import make_response
+
+
+class TestCheckpoint(AsyncTest):
+
+    def test_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint')
+            checkpoint = Checkpoint(path, commit_interval=0)
+            a, b, c = Request('a'), Request('b'), Request('c')
+            checkpoint.record(a, make_response(a))
+            checkpoint.record(b, make_response(b, status=503))
+            checkpoint.record(c, make_response(c, status=-1))
+            # Committed records survive a crash, as seen by a new connection.
+            resumed = Checkpoint(path)
+            self.assertIn(a, resumed)
+            self.assertNotIn(b, resumed)
+            self.assertNotIn(c, resumed)
+            entry = resumed.get(Request('a', meta={'m': 1}))
+            self.assertEqual((entry.url, entry.status, entry.reason), ('a', 200, 'OK'))
+            self.assertEqual((entry.headers, entry.content), ([], b''))
+            self.assertIsNone(resumed.get(b))
+            resumed.close()
+            checkpoint.close()
+
+    def test_store_responses(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint')
+            checkpoint = Checkpoint(path, store_responses=True,
+                                    is_complete=lambda response: response.status == 503)
+            a, b = Request('a'), Request('b')
+            checkpoint.record(a, make_response(a))
+            checkpoint.record(b, make_response(b, status=503, headers={'K': 'v'}))
+            checkpoint.close()
+            checkpoint = Checkpoint(path)
+            self.assertEqual(len(checkpoint), 1)
+            entry = checkpoint.get(b)
+            self.assertEqual((entry.headers, entry.content), ([('K', 'v')], b'content'))
+            checkpoint.close()
+
+    def test_saved_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = Checkpoint(os.path.join(directory, 'checkpoint'))
+            file = Path(directory, 'file')
+            file.write_bytes(b'content')
+            a = Request('a', save_to=file)
+            checkpoint.record(a, Response(url='a', status=200, reason='OK', request=a,
+                                          content=b'', path=file, size=7, digest='d'))
+            self.assertIsNotNone(checkpoint.get(a))
+            self.assertEqual(checkpoint.get_file(a), SavedFile(file, 7, 'd'))
+            # The body is not where the request wants it.
+            self.assertIsNone(checkpoint.get(Request('a')))
+            self.assertIsNone(checkpoint.get(Request('a', save_to=Path(directory, 'other'))))
+            file.write_bytes(b'cut')
+            self.assertIsNone(checkpoint.get(a))
+            file.unlink()
+            self.assertIsNone(checkpoint.get(a))
+            # Error responses are not saved, and resume as they are.
+            b = Request('b', save_to=file)
+            checkpoint.record(b, make_response(b, status=404))
+            self.assertEqual(checkpoint.get(b).status, 404)
+            self.assertIsNone(checkpoint.get_file(b))
+            checkpoint.close()
+
+    @AsyncTest.asynchronize
+    async def test_commit_timer(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint')
+            checkpoint = Checkpoint(path, commit_interval=0.05)
+            a, b = Request('a'), Request('b')
+            checkpoint.record(a, make_response(a))
+            checkpoint.record(b, make_response(b))
+            resumed = Checkpoint(path)
+            self.assertEqual(len(resumed), 0)
+            await asyncio.sleep(0.1)
+            self.assertEqual(len(resumed), 2)
+            resumed.close()
+            checkpoint.close()
@@ -1,13 +1,20 @@
 import asyncio
+import hashlib
 import logging
 import os
+import tempfile
+from pathlib import Path
 from time import time
 
 from yarl import URL
 
-from ..client.client import Client
+from ..client.cache import ResponseCache
+from ..client.cassette import Cassette
+from ..client.checkpoint import Checkpoint
+from ..client.client import Client, PrioritySemaphore, Throttle
 from ..client.request import HTTPMethod, Request
 from .asynctest import AsyncTest
+from .helpers import make_response
 
 
 class TestClient(AsyncTest):
@@ -121,7 +128,7 @@ class TestClient(AsyncTest):
             start = time()
             resp = await client.submit(req)
             finish = time()
-            self.assertTrue(5 < finish - start < 10)
+            self.assertTrue(4 < finish - start < 10)
             self.assertEqual(resp.status, -1)
             self.assertIn("TimeoutError('2s'", resp.reason)
             self.assertEqual(resp.content, b'')
@@ -146,3 +153,252 @@ class TestClient(AsyncTest):
             self.assertEqual(requests, [resp.request for resp in results])
         finally:
             await client.close()
+
+    @AsyncTest.asynchronize
+    async def test_pipeline(self):
+        slow = [Request('http://www.httpbin.org/delay/5')]
+        fast = [Request(f'http://www.httpbin.org/get?i={i}') for i in range(3)]
+        try:
+            client = Client({'sleep_per_request': 0})
+            slow_future = client.submit(slow)
+            fast_future = client.submit(fast)
+            results = await fast_future
+            self.assertFalse(slow_future.done())
+            self.assertEqual(fast, [resp.request for resp in results])
+            results = await slow_future
+            self.assertEqual(slow, [resp.request for resp in results])
+        finally:
+            await client.close()
+
+    @AsyncTest.asynchronize
+    async def test_stream(self):
+        requests = [Request(f'http://www.httpbin.org/delay/{i}') for i in (3, 0, 1)]
+        try:
+            client = Client({'sleep_per_request': 0})
+            results = [resp async for resp in client.stream(requests, buffer=2)]
+            self.assertEqual(len(results), 3)
+            self.assertEqual(results[0].request, requests[1])
+            self.assertCountEqual(requests, [resp.request for resp in results])
+        finally:
+            await client.close()
+
+    @AsyncTest.asynchronize
+    async def test_adaptive_throttle(self):
+        throttle = Throttle(8, 2, asyncio.get_event_loop(), adaptive=True, max_per_host=4)
+        running = 0
+        peak = 0
+
+        async def request(host):
+            nonlocal running, peak
+            async with throttle.request(host):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+            throttle.feedback(host, 0.01, 200)
+
+        await asyncio.gather(*[request('a') for _ in range(40)])
+        self.assertEqual(throttle.state(), {'a': 4})
+        self.assertEqual(peak, 4)
+        throttle.feedback('a', 20, -1)
+        self.assertEqual(throttle.state(), {'a': 2})
+        throttle.feedback('a', 0.01, 503)
+        throttle.feedback('a', 0.01, 429)
+        self.assertEqual(throttle.state(), {'a': 1})
+        peak = 0
+        await asyncio.gather(*[request('a') for _ in range(3)])
+        self.assertLessEqual(peak, 2)
+
+        throttle = Throttle(8, 2, asyncio.get_event_loop())
+        throttle.feedback('a', 20, -1)
+        self.assertEqual(throttle.state(), {})
+
+    @AsyncTest.asynchronize
+    async def test_priority_semaphore(self):
+        loop = asyncio.get_event_loop()
+        semaphore = PrioritySemaphore(1, 0, loop)
+        order = []
+
+        async def request(name, priority):
+            await semaphore.acquire(priority)
+            order.append(name)
+            await asyncio.sleep(0.01)
+            semaphore.release()
+
+        await semaphore.acquire()
+        tasks = [loop.create_task(request(name, priority))
+                 for name, priority in [('low', 0), ('high', 9), ('cancelled', 5), ('mid', 5)]]
+        await asyncio.sleep(0.01)
+        tasks[2].cancel()
+        semaphore.release()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertEqual(order, ['high', 'mid', 'low'])
+        self.assertEqual(len(semaphore), 0)
+
+        # An old low-priority waiter eventually beats new high-priority ones.
+        semaphore = PrioritySemaphore(1, 100, loop)
+        order = []
+        await semaphore.acquire()
+        tasks = [loop.create_task(request('old', 0))]
+        await asyncio.sleep(0.1)
+        tasks.append(loop.create_task(request('new', 5)))
+        await asyncio.sleep(0.01)
+        semaphore.release()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ['old', 'new'])
+
+    @AsyncTest.asynchronize
+    async def test_priority_pacing(self):
+        # Urgent requests jump the queue for rate limit and pacing tokens,
+        # with the default settings too.
+        requests = [Request(f'http://a.example.com/{i}') for i in range(12)]
+        urgent = Request('http://a.example.com/urgent', priority=100)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cassette')
+            cassette = Cassette(path, mode='record')
+            for request in requests + [urgent]:
+                cassette.record(request, make_response(request))
+            cassette.close()
+            for setting in [{}, {'rate_limit': 5, 'sleep_per_request': 0}]:
+                client = Client({'cassette': Cassette(path), **setting})
+                try:
+                    bulk = client.submit(requests)
+                    await asyncio.sleep(0.05)
+                    start = time()
+                    resp = await client.submit(urgent)
+                    self.assertLess(time() - start, 0.6)
+                    self.assertEqual(resp.status, 200)
+                    self.assertFalse(bulk.done())
+                finally:
+                    await client.close()
+
+    @AsyncTest.asynchronize
+    async def test_checkpoint_resumed(self):
+        request = Request('http://a.example.com/')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cassette')
+            cassette = Cassette(path, mode='record')
+            cassette.record(request, make_response(request, content=b''))
+            cassette.close()
+            checkpoint = Checkpoint(os.path.join(directory, 'checkpoint'))
+            try:
+                for resumed in [False, True]:
+                    client = Client({'cassette': Cassette(path), 'checkpoint': checkpoint})
+                    try:
+                        resp = await client.submit(request)
+                        self.assertEqual((resp.status, resp.content), (200, b''))
+                        self.assertEqual(resp.resumed, resumed)
+                    finally:
+                        await client.close()
+            finally:
+                checkpoint.close()
+
+    @AsyncTest.asynchronize
+    async def test_response_cache_body_size(self):
+        # A shared cache serves no body beyond the limit of the request.
+        cache = ResponseCache()
+        request = Request('http://a.example.com/')
+        cache.set(request, make_response(request, content=b'x' * 100))
+        client = Client({'response_cache': cache})
+        try:
+            resp = await client.submit(Request('http://a.example.com/', max_body_size=10))
+            self.assertEqual(resp.status, -1)
+            self.assertIn('BodySizeError', resp.reason)
+            resp = await client.submit(Request('http://a.example.com/', max_body_size=100))
+            self.assertEqual(resp.content, b'x' * 100)
+        finally:
+            await client.close()
+
+    @AsyncTest.asynchronize
+    async def test_submit_wait(self):
+        requests = [Request(f'http://www.httpbin.org/get?i={i}') for i in range(6)]
+        try:
+            client = Client({'max_pending': 2})
+            futures = []
+            for request in requests:
+                futures.append(await client.submit_wait(request))
+                self.assertLessEqual(client._outstanding, 2)
+            results = await asyncio.gather(*futures)
+            self.assertEqual(requests, [resp.request for resp in results])
+        finally:
+            await client.close()
+
+    @AsyncTest.asynchronize
+    async def test_connector(self):
+        client = Client({'concurrency': 8, 'concurrency_per_host': 3})
+        try:
+            connector = client._make_connector()
+            self.assertEqual(connector.limit, 8)
+            self.assertEqual(connector.limit_per_host, 3)
+            self.assertFalse(connector.force_close)
+            await connector.close()
+        finally:
+            await client.close()
+        client = Client({'pool_size': 16, 'pool_size_per_host': 5, 'force_close': True})
+        try:
+            connector = client._make_connector()
+            self.assertEqual(connector.limit, 16)
+            self.assertEqual(connector.limit_per_host, 5)
+            self.assertTrue(connector.force_close)
+            await connector.close()
+        finally:
+            await client.close()
+
+    @AsyncTest.asynchronize
+    async def test_json_body(self):
+        client = Client({'json_backend': 'json'})
+        try:
+            params = client._make_aio_req_params(Request('url', json={'k': 'v'}))[-1]
+            self.assertEqual(params['data'], b'{"k": "v"}')
+            self.assertEqual(params['headers']['Content-Type'], 'application/json')
+        finally:
+            await client.close()
+
+    @AsyncTest.asynchronize
+    async def test_coalesce(self):
+        requests = [Request('http://www.httpbin.org/delay/1', meta={'i': i}) for i in range(4)]
+        try:
+            client = Client()
+            future_1 = client.submit(requests[:2])
+            future_2 = client.submit(requests[2:])
+            results = await future_1 + await future_2
+            self.assertEqual(client.coalesced, 3)
+            self.assertEqual(requests, [resp.request for resp in results])
+            self.assertEqual([{'i': i} for i in range(4)], [resp.meta for resp in results])
+            self.assertTrue(all(resp.content is results[0].content for resp in results))
+        finally:
+            await client.close()
+
+    @AsyncTest.asynchronize
+    async def test_save_to(self):
+        req = Request('http://www.httpbin.org/bytes/100000?seed=0', save_to='./.t')
+        try:
+            client = Client()
+            resp = await client.submit(req)
+            self.assertEqual(resp.status, 200)
+            self.assertEqual(resp.content, b'')
+            self.assertEqual(resp.path, Path('./.t'))
+            self.assertEqual(resp.size, 100000)
+            with open('./.t', 'rb') as file:
+                self.assertEqual(resp.digest, hashlib.sha256(file.read()).hexdigest())
+            os.remove('./.t')
+        finally:
+            await client.close()
+
+    @AsyncTest.asynchronize
+    async def test_max_body_size(self):
+        try:
+            client = Client({'max_body_size': 1000})
+            resp = await client.submit(Request('http://www.httpbin.org/bytes/500'))
+            self.assertEqual(resp.status, 200)
+            self.assertEqual(len(resp.content), 500)
+            resp = await client.submit(Request('http://www.httpbin.org/bytes/2000'))
+            self.assertEqual(resp.status, -1)
+            self.assertIn('BodySizeError', resp.reason)
+            resp = await client.submit(Request('http://www.httpbin.org/stream-bytes/2000'))
+            self.assertEqual(resp.status, -1)
+            self.assertIn('BodySizeError', resp.reason)
+            resp = await client.submit(Request('http://www.httpbin.org/bytes/2000', max_body_size=4000))
+            self.assertEqual(resp.status, 200)
+        finally:
+            await client.close()
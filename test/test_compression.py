@@ -0,0 +1,85 @@
+import gzip
+import unittest
+import zlib
+
+from aiohttp import ClientPayloadError
+
+from ..client import compression
+from ..client.compression import DECOMPRESSORS, decompress, decompress_stream, get_decoder
+from .asynctest import AsyncTest
+
+
+BODY = b'hello world ' * 1000
+
+
+async def iterate(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestCompression(AsyncTest):
+
+    def test_get_decoder(self):
+        self.assertIsNone(get_decoder(None))
+        self.assertIsNone(get_decoder(''))
+        self.assertIsNone(get_decoder('identity'))
+        self.assertIsNone(get_decoder('gzip, unknown'))
+        self.assertIsNotNone(get_decoder('GZIP'))
+        self.assertIn('gzip, deflate', compression.ACCEPT_ENCODING)
+
+    def test_decompress(self):
+        self.assertEqual(decompress(gzip.compress(BODY), 'gzip'), BODY)
+        self.assertEqual(decompress(zlib.compress(BODY), 'deflate'), BODY)
+        raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        self.assertEqual(decompress(raw.compress(BODY) + raw.flush(), 'deflate'), BODY)
+        self.assertEqual(decompress(BODY, 'identity'), BODY)
+        self.assertEqual(decompress(BODY, 'unknown'), BODY)
+        twice = zlib.compress(gzip.compress(BODY))
+        self.assertEqual(decompress(twice, 'gzip, deflate'), BODY)
+        with self.assertRaises(ClientPayloadError):
+            decompress(b'garbage', 'gzip')
+
+    @unittest.skipIf('br' not in DECOMPRESSORS, 'brotli is not installed')
+    def test_brotli(self):
+        data = compression.brotli.compress(BODY)
+        self.assertEqual(decompress(data, 'br'), BODY)
+        self.assertIn('br', compression.ACCEPT_ENCODING)
+
+    @unittest.skipIf('zstd' not in DECOMPRESSORS, 'zstandard is not installed')
+    def test_zstd(self):
+        data = compression.zstandard.ZstdCompressor().compress(BODY)
+        self.assertEqual(decompress(data, 'zstd'), BODY)
+        self.assertIn('zstd', compression.ACCEPT_ENCODING)
+
+    @AsyncTest.asynchronize
+    async def test_decompress_stream(self):
+        data = gzip.compress(BODY)
+        chunks = [data[i:i+100] for i in range(0, len(data), 100)]
+        result = [chunk async for chunk in decompress_stream(iterate(chunks), get_decoder('gzip'))]
+        self.assertEqual(b''.join(result), BODY)
+        result = [chunk async for chunk in decompress_stream(iterate([b'a', b'', b'b']), None)]
+        self.assertEqual(result, [b'a', b'b'])
+
+    @AsyncTest.asynchronize
+    async def test_decompress_bomb(self):
+        size = 64 * 1024 * 1024
+        bombs = {
+            'gzip': gzip.compress(bytes(size)),
+            'deflate': zlib.compress(bytes(size)),
+        }
+        if 'br' in DECOMPRESSORS:
+            bombs['br'] = compression.brotli.compress(bytes(size))
+        if 'zstd' in DECOMPRESSORS:
+            bombs['zstd'] = compression.zstandard.ZstdCompressor().compress(bytes(size))
+        for coding, data in bombs.items():
+            with self.subTest(coding=coding):
+                # The whole bomb arrives as a single chunk, and is still
+                # decompressed in small pieces, one at a time.
+                stream = decompress_stream(iterate([data]), get_decoder(coding))
+                first = await stream.__anext__()
+                self.assertLessEqual(len(first), 4 * 1024 * 1024)
+                total = len(first)
+                async for piece in stream:
+                    self.assertLessEqual(len(piece), 4 * 1024 * 1024)
+                    total += len(piece)
+                self.assertEqual(total, size)
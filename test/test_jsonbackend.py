@@ -0,0 +1,26 @@
+import unittest
+
+from ..client.jsonbackend import JSONBackend, get_json_backend, load_json
+
+
+class TestJSONBackend(unittest.TestCase):
+
+    def test_get_json_backend(self):
+        backend = get_json_backend('json')
+        self.assertEqual(backend.loads(b'{"k": [1]}'), {'k': [1]})
+        self.assertEqual(backend.dumps({'k': [1]}), b'{"k": [1]}')
+        self.assertIs(get_json_backend('auto'), get_json_backend('auto'))
+        self.assertEqual(get_json_backend('auto').loads('{"生": 1}'.encode()), {'生': 1})
+        custom = JSONBackend(lambda content: 'loads', lambda obj: b'dumps')
+        self.assertIs(get_json_backend(custom), custom)
+        with self.assertRaises(ValueError):
+            get_json_backend('unknown')
+
+    def test_orjson(self):
+        try:
+            backend = get_json_backend('orjson')
+        except ImportError:
+            self.skipTest('orjson is not installed')
+        self.assertEqual(backend.loads(b'{"k": [1]}'), {'k': [1]})
+        self.assertEqual(backend.loads(backend.dumps({1: '生'})), {'1': '生'})
+        self.assertEqual(load_json().loads(backend.dumps({'k': [1]})), {'k': [1]})
@@ -0,0 +1,80 @@
+import asyncio
+from time import monotonic
+
+from ..client.ratelimit import RateLimiter, TokenBucket
+from .asynctest import AsyncTest
+
+
+class TestRateLimit(AsyncTest):
+
+    @AsyncTest.asynchronize
+    async def test_token_bucket(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertAlmostEqual(bucket.tokens, 2, places=1)
+        start = monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        elapsed = monotonic() - start
+        self.assertTrue(0.15 < elapsed < 0.35)
+        self.assertLess(bucket.tokens, 1)
+
+    @AsyncTest.asynchronize
+    async def test_token_bucket_cancel(self):
+        bucket = TokenBucket(rate=1, burst=1)
+        await bucket.acquire()
+        task = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(bucket), 1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        self.assertGreaterEqual(bucket.tokens, 0)
+
+    @AsyncTest.asynchronize
+    async def test_token_bucket_priority(self):
+        bucket = TokenBucket(rate=20, burst=1, aging=0)
+        order = []
+
+        async def acquire(name, priority):
+            await bucket.acquire(priority)
+            order.append(name)
+
+        await bucket.acquire()
+        tasks = [asyncio.ensure_future(acquire(name, priority))
+                 for name, priority in [('low', 0), ('cancelled', 9), ('mid', 5), ('high', 9)]]
+        await asyncio.sleep(0)
+        tasks[1].cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertEqual(order, ['high', 'mid', 'low'])
+        self.assertEqual(len(bucket), 0)
+
+    @AsyncTest.asynchronize
+    async def test_rate_limiter(self):
+        limiter = RateLimiter(None, 1, 10, 1)
+        self.assertEqual(limiter.state(), {'tokens': None, 'hosts': {}})
+        start = monotonic()
+        await asyncio.gather(*[limiter.acquire(host) for host in ['a', 'a', 'b', 'b']])
+        elapsed = monotonic() - start
+        self.assertTrue(0.05 < elapsed < 0.2)
+        self.assertEqual(set(limiter.state()['hosts']), {'a', 'b'})
+
+        limiter = RateLimiter(10, 1, None, 1)
+        start = monotonic()
+        await asyncio.gather(*[limiter.acquire(host) for host in ['a', 'b', 'c']])
+        elapsed = monotonic() - start
+        self.assertTrue(0.15 < elapsed < 0.3)
+        self.assertEqual(limiter.state()['hosts'], {})
+        self.assertLess(limiter.state()['tokens'], 1)
+
+    @AsyncTest.asynchronize
+    async def test_pacing(self):
+        limiter = RateLimiter(None, 1, None, 1, pacing_burst=2)
+        start = monotonic()
+        await asyncio.gather(*[limiter.acquire('a', 0.1) for _ in range(4)])
+        await asyncio.gather(*[limiter.acquire('b', 0) for _ in range(4)])
+        elapsed = monotonic() - start
+        self.assertTrue(0.05 < elapsed < 0.2)
+
+        limiter = RateLimiter(None, 1, 100, 4, pacing_burst=2)
+        start = monotonic()
+        await asyncio.gather(*[limiter.acquire('a', 10) for _ in range(4)])
+        self.assertLess(monotonic() - start, 0.1)
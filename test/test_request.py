@@ -18,6 +18,11 @@ class TestRequest(unittest.TestCase):
         self.assertIsNone(req.retry)
         self.assertIsNone(req.retry_interval)
         self.assertIsNone(req.sleep)
+        self.assertIsNone(req.priority)
+        self.assertFalse(req.stream)
+        self.assertIsNone(req.save_to)
+        self.assertIsNone(req.max_body_size)
+        self.assertIsNone(req.cache_ttl)
         self.assertIsNone(req.params)
         self.assertIsNone(req.json)
         self.assertIsNone(req.form)
@@ -36,6 +41,11 @@ class TestRequest(unittest.TestCase):
             retry=2,
             retry_interval=3,
             sleep=4,
+            priority=5,
+            stream=True,
+            save_to='./save_to',
+            max_body_size=6,
+            cache_ttl=7,
             params={'params_key': 'params_value'},
             json={'json_key': 'json_value'},
             form={'form_key': 'form_value'},
@@ -52,6 +62,11 @@ class TestRequest(unittest.TestCase):
         self.assertEqual(req.retry, 2)
         self.assertEqual(req.retry_interval, 3)
         self.assertEqual(req.sleep, 4)
+        self.assertEqual(req.priority, 5)
+        self.assertTrue(req.stream)
+        self.assertEqual(req.save_to, Path('./save_to'))
+        self.assertEqual(req.max_body_size, 6)
+        self.assertEqual(req.cache_ttl, 7)
         self.assertEqual(req.params, {'params_key': 'params_value'})
         self.assertEqual(req.json, {'json_key': 'json_value'})
         self.assertEqual(req.form, {'form_key': 'form_value'})
@@ -60,3 +75,19 @@ class TestRequest(unittest.TestCase):
         self.assertEqual(req.file, Path('./file'))
         self.assertEqual(req.meta, {'meta_key': 'meta_value'})
         self.assertEqual(repr(req), '<Request POST url>')
+
+    def test_fingerprint(self):
+        req = Request('http://a/?x=1', params={'y': '2'}, headers={'K': 'v'}, meta={'m': 1})
+        same = Request('http://a/?y=2&x=1', headers={'k': 'v'}, timeout=3)
+        self.assertEqual(req.fingerprint(), same.fingerprint())
+        self.assertEqual(len(req.fingerprint()), 64)
+        self.assertNotEqual(req.fingerprint(), Request('http://a/?x=1&y=3', headers={'k': 'v'}).fingerprint())
+        self.assertNotEqual(req.fingerprint(), Request('http://a/?x=1&y=2').fingerprint())
+        self.assertNotEqual(
+            Request('http://a/', method=HTTPMethod.POST, json={'k': 1}).fingerprint(),
+            Request('http://a/', method=HTTPMethod.POST, json={'k': 2}).fingerprint(),
+        )
+        self.assertEqual(
+            Request('http://a/', method=HTTPMethod.POST, form={'a': 1, 'b': 2}).fingerprint(),
+            Request('http://a/', method=HTTPMethod.POST, form={'b': 2, 'a': 1}).fingerprint(),
+        )
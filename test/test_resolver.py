@@ -0,0 +1,71 @@
+import asyncio
+import socket
+
+from ..client.resolver import CachingResolver
+from .asynctest import AsyncTest
+
+
+class CountingResolver:
+
+    def __init__(self):
+        self.calls = 0
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if host == 'missing':
+            raise OSError('not found')
+        return [{'hostname': host, 'host': '127.0.0.1', 'port': port,
+                 'family': family, 'proto': 0, 'flags': 0}]
+
+    async def close(self):
+        pass
+
+
+class TestResolver(AsyncTest):
+
+    @AsyncTest.asynchronize
+    async def test_cache(self):
+        inner = CountingResolver()
+        resolver = CachingResolver(inner, ttl=0.05)
+        results = await asyncio.gather(*[resolver.resolve('a', 80) for _ in range(5)])
+        self.assertEqual(inner.calls, 1)
+        self.assertEqual(results[0][0]['host'], '127.0.0.1')
+        await resolver.resolve('a', 80)
+        self.assertEqual(inner.calls, 1)
+        self.assertEqual(resolver.hits, 1)
+        await resolver.resolve('a', 443)
+        self.assertEqual(inner.calls, 2)
+        await asyncio.sleep(0.06)
+        await resolver.resolve('a', 80)
+        self.assertEqual(inner.calls, 3)
+
+    @AsyncTest.asynchronize
+    async def test_negative_cache(self):
+        inner = CountingResolver()
+        resolver = CachingResolver(inner, negative_ttl=10)
+        for _ in range(3):
+            with self.assertRaises(OSError):
+                await resolver.resolve('missing')
+        self.assertEqual(inner.calls, 1)
+
+    @AsyncTest.asynchronize
+    async def test_lru(self):
+        inner = CountingResolver()
+        resolver = CachingResolver(inner, maxsize=2)
+        for host in ['a', 'b', 'a', 'c', 'a']:
+            await resolver.resolve(host)
+        self.assertEqual(inner.calls, 3)
+        await resolver.resolve('b')
+        self.assertEqual(inner.calls, 4)
+
+    @AsyncTest.asynchronize
+    async def test_cancel(self):
+        inner = CountingResolver()
+        resolver = CachingResolver(inner)
+        first = asyncio.ensure_future(resolver.resolve('a'))
+        second = asyncio.ensure_future(resolver.resolve('a'))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual((await second)[0]['hostname'], 'a')
+        self.assertEqual(inner.calls, 1)
@@ -1,12 +1,28 @@
+import asyncio
+import codecs
+import gzip
 import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
+import lxml.html
 from lxml import etree
 from yarl import URL
 
+from ..client.jsonbackend import JSONBackend
 from ..client.request import Request
 from ..client.response import Response
 
 
+class FakeStream:
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    async def iter_chunked(self, size):
+        for chunk in self._chunks:
+            yield chunk
+
+
 class TestResponse(unittest.TestCase):
 
     def test_basic_response(self):
@@ -28,6 +44,9 @@ class TestResponse(unittest.TestCase):
         self.assertEqual(resp.content, b'content')
         self.assertEqual(resp.request, req)
         self.assertEqual(resp.meta, req.meta)
+        self.assertIsNone(resp.path)
+        self.assertIsNone(resp.size)
+        self.assertIsNone(resp.digest)
         self.assertEqual(repr(resp), '<Response 200 url>')
 
     def test_text(self):
@@ -49,14 +68,41 @@ class TestResponse(unittest.TestCase):
         self.assertEqual(resp_utf8.text(), '生')
         self.assertEqual(resp_jp.text('shift-jis'), '生')
 
-        resp_utf8.text()
-        resp_utf8.text('utf-8')
+        self.assertIs(resp_utf8.text(), resp_utf8.text())
+        self.assertEqual(resp_utf8.text('utf-8'), '生')
+        self.assertIs(resp_jp.text('shift-jis'), resp_jp.text('shift-jis'))
+
+    def test_encoding(self):
+        def make(content, headers=None):
+            return Response(
+                url='url',
+                status=200,
+                reason='OK',
+                content=content,
+                request=Request('url'),
+                headers=headers,
+            )
 
-        cache_info = resp_utf8.text.cache_info()
-        self.assertEqual(cache_info.hits, 1)
-        self.assertEqual(cache_info.misses, 2)
-        self.assertEqual(cache_info.maxsize, 8)
-        self.assertEqual(cache_info.currsize, 2)
+        text = '生' * 10
+        resp = make(text.encode('shift-jis'), {'Content-Type': 'text/html; charset=Shift_JIS'})
+        self.assertEqual(resp.headers['content-type'], 'text/html; charset=Shift_JIS')
+        self.assertEqual(resp.encoding, 'Shift_JIS')
+        self.assertEqual(resp.text(), text)
+        resp = make(codecs.BOM_UTF8 + text.encode('utf-8'), {'Content-Type': 'text/html'})
+        self.assertEqual(resp.encoding, 'utf-8-sig')
+        self.assertEqual(resp.text(), text)
+        resp = make(text.encode('utf-16'))
+        self.assertEqual(resp.encoding, 'utf-16')
+        self.assertEqual(resp.text(), text)
+        resp = make(b'<meta charset="euc-jp">' + text.encode('euc-jp'), {'Content-Type': 'text/html; charset=bogus'})
+        self.assertEqual(resp.encoding, 'euc-jp')
+        resp = make(b'<meta http-equiv="Content-Type" content="text/html; charset=gbk">')
+        self.assertEqual(resp.encoding, 'gbk')
+        resp = make(text.encode('utf-8'))
+        self.assertEqual(resp.encoding, 'utf-8')
+        resp = make(b'')
+        self.assertEqual(resp.encoding, 'utf-8')
+        self.assertEqual(resp.headers, {})
 
     def test_json(self):
         resp = Response(
@@ -69,14 +115,18 @@ class TestResponse(unittest.TestCase):
 
         self.assertEqual(resp.json(), [1])
 
-        resp.json()
-        resp.json()
+        self.assertIs(resp.json(), resp.json())
+
+        resp = Response(
+            url='url',
+            status=200,
+            reason='OK',
+            content=b'[1]',
+            request=Request('url'),
+            json_backend=JSONBackend(lambda content: content.decode(), None),
+        )
 
-        cache_info = resp.json.cache_info()
-        self.assertEqual(cache_info.hits, 2)
-        self.assertEqual(cache_info.misses, 1)
-        self.assertEqual(cache_info.maxsize, 2)
-        self.assertEqual(cache_info.currsize, 1)
+        self.assertEqual(resp.json(), '[1]')
 
     def test_etree(self):
         resp = Response(
@@ -92,8 +142,178 @@ class TestResponse(unittest.TestCase):
         self.assertIsInstance(resp.etree(html=False), etree._ElementTree)
         self.assertEqual(etree.tostring(resp.etree(html=False)), b'<a/>')
 
-        cache_info = resp.etree.cache_info()
-        self.assertEqual(cache_info.hits, 2)
-        self.assertEqual(cache_info.misses, 2)
-        self.assertEqual(cache_info.maxsize, 2)
-        self.assertEqual(cache_info.currsize, 2)
+        self.assertIs(resp.etree(), resp.etree())
+        self.assertIs(resp.etree(html=False), resp.etree(html=False))
+
+    def test_html_parser(self):
+        resp = Response(
+            url='url',
+            status=200,
+            reason='OK',
+            content='<p>生</p>'.encode('gbk'),
+            request=Request('url'),
+            headers={'Content-Type': 'text/html; charset=gbk'},
+            html_parser='lxml',
+        )
+
+        tree = resp.etree()
+        self.assertIsInstance(tree, etree._ElementTree)
+        self.assertEqual(tree.xpath('//p')[0].text, '生')
+        self.assertIs(resp.etree(parser='lxml'), tree)
+        tree = resp.etree(parser='html5lib')
+        self.assertEqual(etree.tostring(tree, encoding=str), '<html><head/><body><p>生</p></body></html>')
+        self.assertIs(resp.etree(parser='html5lib'), tree)
+        parser = lambda content, encoding: etree.ElementTree(etree.Element(encoding))
+        self.assertEqual(resp.etree(parser=parser).getroot().tag, 'gbk')
+        with self.assertRaises(ValueError):
+            resp.etree(parser='unknown')
+
+    def test_slots(self):
+        resp = Response(
+            url='url',
+            status=200,
+            reason='OK',
+            content=b'null',
+            request=Request('url'),
+        )
+
+        self.assertFalse(hasattr(resp, '__dict__'))
+        self.assertIsNone(resp.json())
+        self.assertIsNone(resp.json())
+
+    def test_iter_chunks(self):
+        released = []
+
+        async def release():
+            released.append(True)
+
+        async def consume(resp):
+            return [chunk async for chunk in resp.iter_chunks()]
+
+        resp = Response(
+            url='url',
+            status=200,
+            reason='OK',
+            content=b'content',
+            request=Request('url'),
+        )
+        self.assertFalse(resp.streaming)
+        self.assertEqual(asyncio.run(consume(resp)), [b'content'])
+
+        resp = Response(
+            url='url',
+            status=200,
+            reason='OK',
+            content=b'',
+            request=Request('url', stream=True),
+            stream=FakeStream([b'a', b'b']),
+            release=release,
+        )
+        self.assertTrue(resp.streaming)
+        self.assertEqual(asyncio.run(consume(resp)), [b'a', b'b'])
+        self.assertFalse(resp.streaming)
+        self.assertEqual(released, [True])
+        asyncio.run(resp.close())
+        self.assertEqual(released, [True])
+        self.assertEqual(asyncio.run(consume(resp)), [])
+
+    def test_async_parse(self):
+        async def parse(resp):
+            return (await resp.text_async(), await resp.etree_async(),
+                    await resp.etree_async(html=False))
+
+        async def parse_json(resp):
+            return await resp.json_async()
+
+        for executor in [None, ThreadPoolExecutor(1), ProcessPoolExecutor(1)]:
+            resp = Response(
+                url='url',
+                status=200,
+                reason='OK',
+                content='<p>生</p>'.encode('utf-8'),
+                request=Request('url'),
+                executor=executor,
+            )
+            text, html, xml = asyncio.run(parse(resp))
+            self.assertEqual(text, '<p>生</p>')
+            self.assertEqual(html.xpath('//body/p')[0].text, '生')
+            self.assertEqual(xml.getroot().text, '生')
+            self.assertIs(resp.text(), text)
+            self.assertIs(resp.etree(), html)
+            self.assertIs(resp.etree(html=False), xml)
+            html = asyncio.run(resp.etree_async(parser='lxml'))
+            self.assertIsInstance(html.getroot(), lxml.html.HtmlElement)
+            self.assertEqual(html.getroot().text_content(), '生')
+
+            # Attribute names which are valid HTML, but not valid XML.
+            resp = Response(
+                url='url',
+                status=200,
+                reason='OK',
+                content='<div @click="go" :class="x">生</div>'.encode('utf-8'),
+                request=Request('url'),
+                executor=executor,
+            )
+            html = asyncio.run(resp.etree_async(parser='lxml'))
+            self.assertEqual(html.xpath('//div')[0].attrib, {'@click': 'go', ':class': 'x'})
+            html = asyncio.run(resp.etree_async(parser='html5lib'))
+            self.assertEqual(html.xpath('//div')[0].text, '生')
+
+            resp = Response(
+                url='url',
+                status=200,
+                reason='OK',
+                content=b'[1]',
+                request=Request('url'),
+                executor=executor,
+            )
+            self.assertEqual(asyncio.run(parse_json(resp)), [1])
+            self.assertIs(resp.json(), resp.json())
+            if executor is not None:
+                executor.shutdown()
+                # After `Client.close()`, the default executor takes over.
+                resp = Response(
+                    url='url',
+                    status=200,
+                    reason='OK',
+                    content=b'<p>1</p>',
+                    request=Request('url'),
+                    executor=executor,
+                )
+                text, html, xml = asyncio.run(parse(resp))
+                self.assertEqual((text, xml.getroot().text), ('<p>1</p>', '1'))
+
+    def test_lazy_decompress(self):
+        resp = Response(
+            url='url',
+            status=200,
+            reason='OK',
+            content=gzip.compress(b'content'),
+            content_encoding='gzip',
+            request=Request('url'),
+        )
+
+        self.assertEqual(resp.content, b'content')
+        self.assertIs(resp.content, resp.content)
+        self.assertEqual(resp.text(), 'content')
+
+    def test_buffer(self):
+        resp = Response(
+            url='url',
+            status=200,
+            reason='OK',
+            content=bytearray(b'[1]'),
+            request=Request('url'),
+        )
+
+        self.assertIsInstance(resp.buffer, memoryview)
+        self.assertEqual(resp.buffer.tobytes(), b'[1]')
+        self.assertEqual(resp.text(), '[1]')
+        self.assertEqual(resp.json(), [1])
+        self.assertEqual(resp.encoding, 'utf-8')
+        self.assertEqual(resp, Response(url='url', status=200, reason='OK',
+                                        content=b'[1]', request=Request('url')))
+        self.assertIsInstance(resp.content, bytes)
+        self.assertEqual(resp.content, b'[1]')
+        self.assertIs(resp.content, resp.content)
+        self.assertEqual(resp.buffer, b'[1]')
@@ -0,0 +1,66 @@
+import asyncio
+import unittest
+from email.utils import formatdate
+from time import time
+
+from aiohttp import ClientConnectionError
+from multidict import CIMultiDict
+
+from ..client.retry import RetryBudget, RetryPolicy
+
+
+class FakeResponse:
+
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = CIMultiDict(headers or {})
+
+
+class TestRetry(unittest.TestCase):
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, reserve=2)
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+        [budget.deposit() for _ in range(10)]
+        self.assertEqual(budget.balance, 2)
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff=2, jitter=0, max_interval=5)
+        self.assertEqual(policy.interval(0, 3, 1, exception=asyncio.TimeoutError()), 1)
+        self.assertEqual(policy.interval(1, 3, 1, exception=ClientConnectionError()), 2)
+        self.assertEqual(policy.interval(2, 3, 2, exception=asyncio.TimeoutError()), 5)
+        self.assertIsNone(policy.interval(3, 3, 1, exception=asyncio.TimeoutError()))
+        self.assertIsNone(policy.interval(0, 3, 1, exception=ValueError()))
+
+        policy = RetryPolicy(backoff=1, jitter=0.5, budget=RetryBudget(ratio=1))
+        for _ in range(20):
+            policy.start()
+            self.assertTrue(0.5 <= policy.interval(0, 1, 1, exception=asyncio.TimeoutError()) <= 1)
+
+    def test_status(self):
+        policy = RetryPolicy(jitter=0)
+        self.assertIsNone(policy.interval(0, 1, 1, response=FakeResponse(200)))
+        self.assertIsNone(policy.interval(0, 1, 1, response=FakeResponse(404)))
+        self.assertEqual(policy.interval(0, 1, 1, response=FakeResponse(503)), 1)
+        response = FakeResponse(429, {'Retry-After': '7'})
+        self.assertEqual(policy.interval(0, 1, 1, response=response), 7)
+        response = FakeResponse(503, {'Retry-After': formatdate(time() + 30, usegmt=True)})
+        self.assertTrue(28 < policy.interval(0, 1, 1, response=response) <= 30)
+        response = FakeResponse(503, {'Retry-After': 'soon'})
+        self.assertEqual(policy.interval(0, 1, 1, response=response), 1)
+        response = FakeResponse(503, {'Retry-After': '3600'})
+        self.assertEqual(policy.interval(0, 1, 1, response=response), 60)
+        policy = RetryPolicy(jitter=0, retry_after=False)
+        response = FakeResponse(429, {'Retry-After': '7'})
+        self.assertEqual(policy.interval(0, 1, 1, response=response), 1)
+
+    def test_exhausted_budget(self):
+        policy = RetryPolicy(budget=RetryBudget(ratio=0, reserve=1))
+        self.assertIsNotNone(policy.interval(0, 5, 1, exception=asyncio.TimeoutError()))
+        self.assertIsNone(policy.interval(1, 5, 1, exception=asyncio.TimeoutError()))
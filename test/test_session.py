@@ -0,0 +1,91 @@
+import asyncio
+import os
+import tempfile
+from http.cookies import SimpleCookie
+
+from yarl import URL
+
+from ..client.session import SessionStore
+from .asynctest import AsyncTest
+
+
+URL_A = URL('http://a.example.com/')
+
+
+class TestSessionStore(AsyncTest):
+
+    @AsyncTest.asynchronize
+    async def test_cookies(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'session')
+            store = SessionStore(path)
+            store.cookie_jar.update_cookies(SimpleCookie('a=1; Max-Age=60'), URL_A)
+            store.cookie_jar.update_cookies(SimpleCookie('b=2; Max-Age=0'), URL_A)
+            store.cookie_jar.update_cookies({'c': '3'}, URL_A)
+            store.close()
+
+            store = SessionStore(path)
+            cookies = store.cookie_jar.filter_cookies(URL_A)
+            self.assertEqual({name: morsel.value for name, morsel in cookies.items()},
+                             {'a': '1', 'c': '3'})
+            self.assertEqual(len(store.cookie_jar.filter_cookies(URL('http://b.example.com/'))), 0)
+            with open(path) as file:
+                self.assertNotIn('Max-Age', file.read())
+            store.close()
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+    @AsyncTest.asynchronize
+    async def test_state(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'session')
+            store = SessionStore(path)
+            store['token'] = 'abc'
+            store['user'] = {'id': 1}
+            del store['user']
+            store.close()
+            with open(path, 'a') as file:
+                file.write('["s","torn')
+
+            store = SessionStore(path)
+            self.assertEqual(dict(store), {'token': 'abc'})
+            store['user'] = {'id': 2}
+            store.close()
+
+            store = SessionStore(path)
+            self.assertEqual(dict(store), {'token': 'abc', 'user': {'id': 2}})
+            store.close()
+
+    def test_no_loop(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'session')
+            with open(path, 'w') as file:
+                file.write('["c","http://a.example.com/","a=1"]\n')
+            store = SessionStore(path)
+
+            async def filter_cookies():
+                return store.cookie_jar.filter_cookies(URL_A)['a'].value
+
+            self.assertEqual(asyncio.run(filter_cookies()), '1')
+            store.close()
+
+    @AsyncTest.asynchronize
+    async def test_compact(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'session')
+            store = SessionStore(path)
+            for i in range(10):
+                store['token'] = i
+                store.cookie_jar.update_cookies({'a': str(i)}, URL_A)
+            store.close()
+            with open(path) as file:
+                self.assertEqual(len(file.readlines()), 20)
+
+            store = SessionStore(path)
+            with open(path) as file:
+                self.assertEqual(len(file.readlines()), 2)
+            self.assertEqual(store['token'], 9)
+            self.assertEqual(store.cookie_jar.filter_cookies(URL_A)['a'].value, '9')
+            store['token'] = 10
+            store.close()
+            with open(path) as file:
+                self.assertEqual(len(file.readlines()), 3)